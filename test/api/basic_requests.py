@@ -1,58 +1,153 @@
 import requests
 from test.helpers.utils import load_config
 from test.helpers.utils import api_logger
-from datetime import datetime
+from test.helpers.rate_limiter import acquire as acquire_rate_limit
+from test.helpers.streaming import consume_stream
+from test.helpers.schema_validator import validate_inline
+from test.helpers.json_codec import dumps_bytes
+from test.helpers import phase_timing
+from test.helpers.clock import now_ns
+from test.helpers.profiling import profiled
+from test.helpers.compression import (compress_body, accept_encoding_header, read_measured_body,
+                                      body_sizes)
+
+
+@profiled("network_wait")
+def _request(method: str, url: str, timed: bool = False, **kwargs):
+    """
+    Sends a request like requests.request. With timed set, the request goes through a
+    PhaseTimingAdapter, still on a fresh session so each request opens its own connection.
+    """
+    if not timed:
+        return requests.request(method, url, **kwargs)
+    with requests.Session() as session:
+        adapter = phase_timing.PhaseTimingAdapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session.request(method, url, **kwargs)
 
 
-def post(endpoint: str, payload: dict = None, headers: dict = None, files: dict = None,
-         form_data: dict = None):
+def _send(method: str, endpoint: str, log_payload: dict, log_headers: dict, headers: dict = None,
+          compress: str = None, **kwargs):
     """
-    Sends a POST request to the specified endpoint with the given payload and headers.
+    Sends a request and logs it. Shared by all the request helpers below.
 
     Args:
+        method (str): The HTTP method (e.g., 'POST').
         endpoint (str): The API endpoint to send the request to.
-        payload (dict): (optional) The data to be sent in the body of the request.
+        log_payload (dict): The payload written to the request log.
+        log_headers (dict): The headers written to the request log.
         headers (dict): (optional) The headers to include in the request.
-        files (dict): (optional) The files to include in the request.
-        form_data (dict): (optional) Form data payload
+        compress (str): (optional) Content encoding for the JSON body ('gzip', 'deflate' or 'br').
+        **kwargs: Passed through to requests (json, data, files). A bytes json body is sent as
+            already encoded JSON.
 
     Returns:
         response: The response object returned by the requests library.
     """
-    start_time = datetime.now()
     config = load_config()
+    acquire_rate_limit(config, method, endpoint)
     url = f"{config['base_url']}{endpoint}"
 
+    compression = config.get("compression", {})
+    compress = compress or compression.get("request")
+    accept_encoding = accept_encoding_header(compression)
+    # JSON bodies are encoded with the JSON codec; pre-encoded bodies (bytes) are sent as they are
+    json_body = kwargs.pop("json", None)
+    if accept_encoding or json_body is not None:
+        headers = dict(headers or {})
+        if accept_encoding:
+            headers["Accept-Encoding"] = accept_encoding
+        if json_body is not None:
+            body = json_body if isinstance(json_body, bytes) else dumps_bytes(json_body)
+            kwargs["data"] = compress_body(body, compress) if compress else body
+            headers["Content-Type"] = "application/json"
+            if compress:
+                headers["Content-Encoding"] = compress
+
+    timed = config.get("phase_timing", False)
+    if timed:
+        phase_timing.start()
+    start_ns = now_ns()
+    if compression.get("measure_decode"):
+        response = _request(method, url, timed, headers=headers, stream=True, **kwargs)
+        wire_bytes, decoded_bytes, decode_ms = read_measured_body(response)
+    else:
+        response = _request(method, url, timed, headers=headers, **kwargs)
+        wire_bytes, decoded_bytes = body_sizes(response)
+        decode_ms = None
+    end_ns = now_ns()
+    phases = phase_timing.finish() if timed else None
+    api_logger(endpoint, log_payload, log_headers, response.text, method, start_ns, end_ns,
+               wire_bytes=wire_bytes, decoded_bytes=decoded_bytes, decode_ms=decode_ms,
+               status_code=response.status_code, response_headers=dict(response.headers), phases=phases)
+
+    # Opt-in: check every response against schema_db.json as it arrives
+    inline_validation = config.get("inline_schema_validation", {})
+    if inline_validation.get("enabled"):
+        inline_results = validate_inline(inline_validation, method, endpoint, response)
+        if inline_results is not None:
+            response.schema_key, response.schema_results = inline_results
+            response.schema_options = (inline_validation.get("payload_must_match", False),
+                                       inline_validation.get("headers_must_match", False))
+    return response
+
+
+def post(endpoint: str, payload=None, headers: dict = None, files: dict = None,
+         form_data: dict = None, compress: str = None):
+    """
+    Sends a POST request to the specified endpoint with the given payload and headers.
+
+    Args:
+        endpoint (str): The API endpoint to send the request to.
+        payload (dict | bytes): (optional) The data to be sent in the body of the request, or an
+            already encoded JSON body (e.g. from BodyTemplate.render).
+        headers (dict): (optional) The headers to include in the request.
+        files (dict): (optional) The files to include in the request.
+        form_data (dict): (optional) Form data payload
+        compress (str): (optional) Content encoding for a JSON payload ('gzip', 'deflate' or 'br').
+
+    Returns:
+        response: The response object returned by the requests library.
+    """
     # Decide whether to include json or data in the request
     if form_data:
-        response = requests.post(url, data=form_data, headers=headers)
+        body = {"data": form_data}
     elif payload and not files:
-        response = requests.post(url, json=payload, headers=headers)
+        body = {"json": payload}
     elif files:
-        response = requests.post(url, files=files, headers=headers, data=payload)
+        body = {"files": files, "data": payload}
     else:
-        response = requests.post(url, headers=headers)
+        body = {}
 
-    end_time = datetime.now()
-    api_logger(endpoint, payload, headers, response.text, "POST", start_time, end_time)
-    return response
+    return _send("POST", endpoint, payload, headers, headers, compress, **body)
 
 
-def get(endpoint: str):
+def get(endpoint: str, stream: bool = False, patterns: list = None):
     """
     Sends a GET request to the specified endpoint.
 
     Args:
         endpoint (str): The API endpoint to send the request to.
+        stream (bool): (optional) Consume the body in chunks instead of reading it into memory.
+            The body summary is attached as response.streamed and response.text is not available.
+        patterns (list): (optional) Strings to search for while streaming the body.
 
     Returns:
         response: The response object returned by the requests library.
     """
-    start_time = datetime.now()
+    if not stream:
+        return _send("GET", endpoint, {}, {})
+
     config = load_config()
-    response = requests.get(f"{config['base_url']}"+endpoint)
-    end_time = datetime.now()
-    api_logger(endpoint, {}, {}, response.text, "GET", start_time, end_time)
+    acquire_rate_limit(config, "GET", endpoint)
+    start_ns = now_ns()
+    response = _request("GET", f"{config['base_url']}"+endpoint, stream=True)
+    response.streamed = consume_stream(response, patterns, config.get("stream_log_prefix_bytes", 4096))
+    end_ns = now_ns()
+    api_logger(endpoint, {}, {}, response.streamed.log_text(), "GET", start_ns, end_ns,
+               wire_bytes=response.raw.tell(), decoded_bytes=response.streamed.size,
+               status_code=response.status_code, response_headers=dict(response.headers))
     return response
 
 
@@ -66,51 +161,38 @@ def delete(endpoint: str):
     Returns:
         response: The response object returned by the requests library.
     """
-    start_time = datetime.now()
-    config = load_config()
-    response = requests.delete(f"{config['base_url']}"+endpoint)
-    end_time = datetime.now()
-    api_logger(endpoint, {}, {}, response.text, "DELETE", start_time, end_time)
-    return response
+    return _send("DELETE", endpoint, {}, {})
 
 
-def put(endpoint: str, payload: dict, headers: dict):
+def put(endpoint: str, payload, headers: dict, compress: str = None):
     """
     Sends a PUT request to the specified endpoint with the given payload and headers.
 
     Args:
         endpoint (str): The API endpoint to send the request to.
-        payload (dict): The data to be sent in the body of the request.
+        payload (dict | bytes): The data to be sent in the body of the request, or an already
+            encoded JSON body (e.g. from BodyTemplate.render).
         headers (dict): The headers to include in the request.
+        compress (str): (optional) Content encoding for the payload ('gzip', 'deflate' or 'br').
 
     Returns:
         response: The response object returned by the requests library.
     """
-    start_time = datetime.now()
-    config = load_config()
-    response = requests.put(f"{config['base_url']}"+endpoint, json=payload,
-                            headers=headers)
-    end_time = datetime.now()
-    api_logger(endpoint, payload, headers, response.text, "PUT", start_time, end_time)
-    return response
+    return _send("PUT", endpoint, payload, headers, headers, compress, json=payload)
 
 
-def patch(endpoint: str, payload: dict, headers: dict):
+def patch(endpoint: str, payload, headers: dict, compress: str = None):
     """
     Sends a PATCH request to the specified endpoint with the given payload and headers.
 
     Args:
         endpoint (str): The API endpoint to send the request to.
-        payload (dict): The data to be sent in the body of the request.
+        payload (dict | bytes): The data to be sent in the body of the request, or an already
+            encoded JSON body (e.g. from BodyTemplate.render).
         headers (dict): The headers to include in the request.
+        compress (str): (optional) Content encoding for the payload ('gzip', 'deflate' or 'br').
 
     Returns:
         response: The response object returned by the requests library.
     """
-    start_time = datetime.now()
-    config = load_config()
-    response = requests.patch(f"{config['base_url']}"+endpoint, json=payload,
-                              headers=headers)
-    end_time = datetime.now()
-    api_logger(endpoint, payload, headers, response.text, "PATCH", start_time, end_time)
-    return response
+    return _send("PATCH", endpoint, payload, headers, headers, compress, json=payload)
@@ -0,0 +1,208 @@
+"""
+Validates many responses of one endpoint at once, for load runs where every response is checked.
+
+Usage of the benchmark (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.batch_validation
+    python -m test.helpers.batch_validation --kind order --responses 50000
+"""
+import argparse
+import sys
+from test.helpers.clock import now_ns
+from test.helpers.payload_generator import PayloadGenerator
+from test.helpers.schema_validator import compiled_schema, flatten_body, flatten_response_body, resolve_schema_key
+from test.helpers.profiling import profiled
+
+# Headers as the Petstore sends them, for the benchmark
+BENCHMARK_HEADERS = {
+    "Date": "Mon, 19 Oct 2026 10:00:00 GMT",
+    "Content-Type": "application/json",
+    "Transfer-Encoding": "chunked",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, DELETE, PUT",
+    "Access-Control-Allow-Headers": "Content-Type, api_key, Authorization",
+    "Server": "Jetty(9.2.9.v20150224)"
+}
+
+
+class BatchValidator:
+    """
+    Validates many responses of one endpoint and method at once, for load runs where every
+    response should be checked.
+
+    Responses of one endpoint nearly all have the same shape: the same keys with values of the
+    same types. validate() therefore checks presence and types once per distinct signature (the
+    keys of a flattened body or header dict and the types of their values) and applies the result
+    to every response sharing it. Only fields with value constraints (enum, format, min/max, items)
+    are still checked per response.
+
+    Every schema field has a bit in fields order (body fields first, then headers); a response's
+    bitset has the bit set for each field it mismatched, 0 means the response matches.
+    """
+
+    def __init__(self, service: str, endpoint: str, method: str):
+        service, endpoint = resolve_schema_key(service, endpoint)
+        self.schema = compiled_schema(service, endpoint, method)
+        if self.schema is None:
+            raise KeyError(f"No schema DB entry for {method} {endpoint}")
+        self.fields = [("BODY", check[0]) for check in self.schema.body_checks] + \
+                      [("HEADERS", check[0]) for check in self.schema.header_checks]
+        # {signature: (type mismatch bits, [(flag, key, constraints) left to check per value])},
+        # kept across batches since the schema does not change
+        self.body_plans = {}
+        self.header_plans = {}
+        self.bodies = []
+        self.headers = []
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def add(self, response):
+        """
+        Adds a response to the batch.
+        """
+        self.bodies.append(flatten_response_body(response))
+        self.headers.append(dict(response.headers))
+
+    def add_flattened(self, flattened_body: dict, headers: dict):
+        """
+        Adds an already flattened body and its headers, e.g. from a recorded log.
+        """
+        self.bodies.append(flattened_body)
+        self.headers.append(headers)
+
+    def clear(self):
+        self.bodies = []
+        self.headers = []
+
+    @staticmethod
+    def _violates(key, value, constraints):
+        for constraint in constraints:
+            if constraint(key, value, []):
+                return True
+        return False
+
+    @staticmethod
+    def _plan(checks: list, first_bit: int, row: dict):
+        type_bits, value_checks = 0, []
+        for bit, (key, _, allowed_types, optional, constraints) in enumerate(checks, first_bit):
+            flag = 1 << bit
+            if key not in row:
+                if not optional:
+                    type_bits |= flag
+            elif type(row[key]).__name__ not in allowed_types:
+                type_bits |= flag
+            elif constraints and row[key] is not None:
+                value_checks.append((flag, key, constraints))
+        return type_bits, value_checks
+
+    @profiled("schema_validation")
+    def validate(self):
+        """
+        Checks every response added so far.
+
+        Returns:
+        - list: One int bitset per response, in the order the responses were added.
+        """
+        body_plans, header_plans = self.body_plans, self.header_plans
+        body_checks, header_checks = self.schema.body_checks, self.schema.header_checks
+        bitsets = []
+        for body, headers in zip(self.bodies, self.headers):
+            signature = (*body, *map(type, body.values()))
+            body_plan = body_plans.get(signature)
+            if body_plan is None:
+                body_plan = body_plans[signature] = self._plan(body_checks, 0, body)
+            signature = (*headers, *map(type, headers.values()))
+            header_plan = header_plans.get(signature)
+            if header_plan is None:
+                header_plan = header_plans[signature] = self._plan(header_checks, len(body_checks), headers)
+
+            bitset = body_plan[0] | header_plan[0]
+            for flag, key, constraints in body_plan[1]:
+                if self._violates(key, body[key], constraints):
+                    bitset |= flag
+            for flag, key, constraints in header_plan[1]:
+                if self._violates(key, headers[key], constraints):
+                    bitset |= flag
+            bitsets.append(bitset)
+        return bitsets
+
+    def mismatched_fields(self, bitset: int):
+        """
+        Lists the (label, key) fields set in a bitset returned by validate().
+        """
+        return [field for bit, field in enumerate(self.fields) if bitset >> bit & 1]
+
+    def messages(self, index: int):
+        """
+        Returns the full schema_validation messages for one response of the batch, for reporting
+        the few responses whose bitset is not 0.
+        """
+        return self.schema.validate(self.bodies[index], self.headers[index])
+
+
+BENCHMARK_SCHEMAS = {"pet": ("pet", "/v2/pet", "POST"), "order": ("store", "/v2/store/order", "POST")}
+
+
+def benchmark(kind: str = "pet", responses: int = 10000, repeat: int = 5, seed: int = 0):
+    """
+    Times validate() against checking the same responses one at a time with
+    CompiledSchema.validate, on generated bodies that match the schema.
+
+    Parameters:
+    - kind (str): "pet" (POST /v2/pet, types only) or "order" (POST /v2/store/order, with the
+      shipDate format constraint).
+    - responses (int): The number of responses per batch.
+    - repeat (int): The number of timed runs; the fastest one counts.
+    - seed (int): The PayloadGenerator seed.
+
+    Returns:
+    - dict: per_response_us and batch_us, in microseconds per response, and signatures, the
+      number of distinct body signatures in the batch.
+    """
+    generator = PayloadGenerator(seed=seed)
+    bodies = generator.pets(responses) if kind == "pet" else generator.orders(responses)
+    validator = BatchValidator(*BENCHMARK_SCHEMAS[kind])
+    for body in bodies:
+        validator.add_flattened(flatten_body(body), dict(BENCHMARK_HEADERS))
+
+    def fastest(run):
+        best = None
+        for _ in range(repeat):
+            start = now_ns()
+            run()
+            elapsed = now_ns() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return round(best / 1000 / responses, 3)
+
+    def one_at_a_time():
+        for body, headers in zip(validator.bodies, validator.headers):
+            validator.schema.validate(body, headers)
+
+    def batch():
+        # Start without cached signatures, as a fresh validator would
+        validator.body_plans.clear()
+        validator.header_plans.clear()
+        validator.validate()
+
+    return {"per_response_us": fastest(one_at_a_time), "batch_us": fastest(batch),
+            "signatures": len(validator.body_plans)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark BatchValidator against validating responses one at a time.")
+    parser.add_argument("--kind", choices=sorted(BENCHMARK_SCHEMAS), default="pet")
+    parser.add_argument("--responses", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.kind, args.responses, args.repeat)
+    print(f"{args.responses} {args.kind} responses, {result['signatures']} distinct body signatures")
+    print(f"one at a time: {result['per_response_us']:.2f} us/response")
+    print(f"batch:         {result['batch_us']:.2f} us/response "
+          f"({result['per_response_us'] / result['batch_us']:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
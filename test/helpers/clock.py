@@ -0,0 +1,35 @@
+"""
+The framework's clock: durations come from a monotonic nanosecond counter, which NTP adjustments
+cannot make jump, and absolute timestamps are derived from one wall-clock reading taken when the
+run starts.
+"""
+import time
+
+# Read together once per run; forked workers inherit them, and perf_counter is system-wide
+_WALL_ANCHOR_NS = time.time_ns()
+_COUNTER_ANCHOR_NS = time.perf_counter_ns()
+
+
+def now_ns():
+    """
+    Returns the monotonic counter in nanoseconds. Only differences between readings are meaningful.
+    """
+    return time.perf_counter_ns()
+
+
+def elapsed_ms(start_ns: int, end_ns: int = None):
+    """
+    Returns the milliseconds between two now_ns() readings, or from start_ns until now.
+    """
+    return ((end_ns if end_ns is not None else time.perf_counter_ns()) - start_ns) / 1e6
+
+
+def wall_time(counter_ns: int = None):
+    """
+    Converts a now_ns() reading (default: now) to a local timestamp such as
+    '2024-05-01 12:30:45.123456', the format of str(datetime.now()), which sorts as text.
+    """
+    if counter_ns is None:
+        counter_ns = time.perf_counter_ns()
+    seconds, nanoseconds = divmod(_WALL_ANCHOR_NS + counter_ns - _COUNTER_ANCHOR_NS, 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(seconds))}.{nanoseconds // 1000:06d}"
@@ -0,0 +1,112 @@
+import gzip
+import zlib
+from test.helpers.clock import elapsed_ms, now_ns
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, "br" is only offered when it is installed
+    brotli = None
+
+SUPPORTED_ENCODINGS = ["gzip", "deflate"] + (["br"] if brotli is not None else [])
+
+
+def compress_body(body: bytes, encoding: str):
+    """
+    Compresses a request body with the given content encoding.
+
+    Parameters:
+    - body (bytes): The encoded request body.
+    - encoding (str): One of 'gzip', 'deflate' or 'br'.
+
+    Returns:
+    - bytes: The compressed body.
+    """
+    if encoding == "gzip":
+        return gzip.compress(body)
+    if encoding == "deflate":
+        return zlib.compress(body)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress_body(body: bytes, encoding: str):
+    """
+    Decompresses a response body sent with the given content encoding.
+
+    Parameters:
+    - body (bytes): The body as received on the wire.
+    - encoding (str): The Content-Encoding header value, empty or 'identity' for plain bodies.
+
+    Returns:
+    - bytes: The decoded body.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate streams without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def accept_encoding_header(settings: dict):
+    """
+    Builds the Accept-Encoding value from the "compression" config section.
+
+    Returns:
+    - str: The header value, or None to keep the requests default ('gzip, deflate').
+    """
+    accept = settings.get("accept_encoding")
+    if accept is None:
+        return None
+    if accept == "all":
+        return ", ".join(SUPPORTED_ENCODINGS)
+    return accept
+
+
+def read_measured_body(response):
+    """
+    Reads a streamed response body, timing the decompression separately from the transfer.
+
+    The decoded body is stored on the response, so response.text and response.json() keep working.
+
+    Parameters:
+    - response: A response object returned by requests with stream=True.
+
+    Returns:
+    - tuple: (wire_bytes, decoded_bytes, decode_ms)
+    """
+    raw_body = response.raw.read(decode_content=False)
+    start_ns = now_ns()
+    body = decompress_body(raw_body, response.headers.get("Content-Encoding"))
+    decode_ms = elapsed_ms(start_ns)
+    response._content = body
+    response._content_consumed = True
+    response.close()
+    return len(raw_body), len(body), decode_ms
+
+
+def body_sizes(response):
+    """
+    Returns the number of body bytes received on the wire and after decoding.
+
+    urllib3 counts the raw (still compressed) bytes it read from the socket, so this works for
+    responses that were already read by requests without reading them again.
+
+    Returns:
+    - tuple: (wire_bytes, decoded_bytes)
+    """
+    decoded_bytes = len(response.content)
+    try:
+        wire_bytes = response.raw.tell()
+    except (AttributeError, OSError):
+        wire_bytes = decoded_bytes
+    return wire_bytes, decoded_bytes
@@ -0,0 +1,146 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from test.helpers.bulk import bulk_create
+from test.helpers.utils import load_config, use_private_data
+
+
+class FixturePool:
+    """
+    Keeps a pool of ready-made test resources topped up by a background thread, so tests can
+    check out an already-created pet or order instead of waiting for a POST round trip.
+
+    The pool is configured with the "fixture_pool" section of config.json:
+        "fixture_pool": {"enabled": true, "size": 10, "max_in_flight": 4, "policy": "recycle"}
+
+    The policy decides what happens to a resource handed back with release(), which the specs
+    do through release_checked_out() after every test:
+    - "keep" (default): nothing, the resource stays registered for the suite clean-up.
+    - "recycle": clean resources go back into the pool for the next test.
+    - "delete": the resource is deleted right away with dispose_fn.
+
+    Resources are created in the background with their own random and Faker, so provisioning
+    does not disturb the seeded data of the running test.
+    """
+
+    def __init__(self, create_fn, dispose_fn=None):
+        """
+        Parameters:
+        - create_fn (callable): Creates one resource with default data and registers it for cleanup.
+        - dispose_fn (callable, optional): Deletes one resource, used by the "delete" policy.
+        """
+        self.create_fn = create_fn
+        self.dispose_fn = dispose_fn
+        self._settings = None
+        self._ready = queue.Queue()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._checked_out = []
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            self._settings = load_config().get("fixture_pool", {})
+        return self._settings
+
+    @property
+    def enabled(self):
+        return bool(self.settings.get("enabled", False)) and not self._stopped.is_set()
+
+    def start(self):
+        """
+        Starts the background provisioner if it is not running yet.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._provision, daemon=True)
+                self._thread.start()
+
+    def _provision(self):
+        use_private_data()
+        size = self.settings.get("size", 10)
+        max_in_flight = self.settings.get("max_in_flight", 4)
+        while not self._stopped.is_set():
+            missing = size - self._ready.qsize()
+            if missing > 0:
+                try:
+                    for resource in bulk_create(self.create_fn, missing, max_in_flight):
+                        self._ready.put(resource)
+                except Exception as e:
+                    logging.error("Fixture pool failed to provision resources: %s", e)
+                    self._stopped.wait(1)
+                continue
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+    def checkout(self):
+        """
+        Takes a ready resource from the pool, creating one synchronously if the pool ran dry.
+
+        Returns:
+        - The resource, as returned by create_fn.
+        """
+        self.start()
+        try:
+            resource = self._ready.get_nowait()
+        except queue.Empty:
+            resource = self.create_fn()
+        self._wakeup.set()
+        with self._lock:
+            self._checked_out.append(resource)
+        return resource
+
+    def release(self, resource, dirty: bool = False):
+        """
+        Hands a checked out resource back to the pool, applying the configured policy.
+
+        Parameters:
+        - resource: The resource returned by checkout().
+        - dirty (bool): True if the test modified or deleted the resource, so it must not be recycled.
+        """
+        with self._lock:
+            if any(resource is checked_out for checked_out in self._checked_out):
+                self._checked_out = [checked_out for checked_out in self._checked_out if checked_out is not resource]
+        policy = self.settings.get("policy", "keep")
+        if policy == "recycle" and not dirty and not self._stopped.is_set():
+            self._ready.put(resource)
+        elif policy == "delete" and self.dispose_fn is not None:
+            self.dispose_fn(resource)
+
+    def release_checked_out(self, dirty: bool = False):
+        """
+        Releases every resource checked out and not released yet, e.g. at the end of a test.
+
+        Parameters:
+        - dirty (bool): True if the test may have modified or deleted the resources.
+        """
+        with self._lock:
+            resources, self._checked_out = self._checked_out, []
+        for resource in resources:
+            self.release(resource, dirty)
+
+    @contextmanager
+    def lease(self):
+        """
+        Checks out a resource for the duration of a with block. The resource is released as
+        dirty if the block raises.
+        """
+        resource = self.checkout()
+        dirty = True
+        try:
+            yield resource
+            dirty = False
+        finally:
+            self.release(resource, dirty)
+
+    def stop(self):
+        """
+        Stops the background provisioner. Resources still in the pool stay registered for cleanup.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,57 @@
+"""
+Fixed-layout latency histograms that can be kept in shared memory and merged by adding counts.
+
+Latencies are recorded in microseconds. Values below 16 us get one bucket each; above that every
+power of two is split into 16 buckets, so a bucket is at most ~6% wide. The last of the BUCKETS
+buckets starts at about 9 hours and also takes every longer latency.
+"""
+SUB_BUCKETS = 16
+BUCKETS = 512
+
+
+def bucket_index(latency_us: int):
+    """
+    Returns the bucket of a latency in microseconds.
+    """
+    if latency_us < SUB_BUCKETS:
+        return max(latency_us, 0)
+    shift = latency_us.bit_length() - 5
+    return min(SUB_BUCKETS + shift * SUB_BUCKETS + (latency_us >> shift) - SUB_BUCKETS, BUCKETS - 1)
+
+
+def bucket_lower_bound(index: int):
+    """
+    Returns the smallest latency in microseconds that falls into a bucket.
+    """
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    return (SUB_BUCKETS + offset) << shift
+
+
+def percentile(counts, fraction: float):
+    """
+    Returns the latency in microseconds at a percentile (0.5 for the median, 0.99 for p99),
+    or None if the histogram is empty.
+
+    Parameters:
+    - counts (sequence): The bucket counts.
+    - fraction (float): The percentile as a fraction between 0 and 1.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = max(1, round(total * fraction))
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return bucket_lower_bound(index)
+    return bucket_lower_bound(len(counts) - 1)
+
+
+def merge(*histograms):
+    """
+    Adds histograms bucket by bucket.
+    """
+    return [sum(counts) for counts in zip(*histograms)]
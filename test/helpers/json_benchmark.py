@@ -0,0 +1,97 @@
+"""
+Benchmarks the JSON backends of test/helpers/json_codec.py on typical Petstore bodies.
+
+Usage (with the repository root on PYTHONPATH):
+    python -m test.helpers.json_benchmark
+    python -m test.helpers.json_benchmark --pets 2000 --repeat 5
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+
+
+def pet_body(rng: random.Random, pet_id: int):
+    """
+    Builds a pet shaped like the Petstore responses (see generate_random_pet_data).
+    """
+    return {
+        "id": pet_id,
+        "category": {"id": rng.randint(1, 10000), "name": rng.choice(["Dog", "Cat", "Bird", "Fish", "Reptile"])},
+        "name": rng.choice(["Bella", "Max", "Luna", "Charlie", "Lucy", "Cooper"]),
+        "photoUrls": [f"https://www.example.com/photos/{rng.randint(1, 10 ** 6)}.jpg"
+                      for _ in range(rng.randint(1, 3))],
+        "tags": [{"id": rng.randint(1, 10000), "name": rng.choice(["friendly", "small", "vaccinated", "young"])}
+                 for _ in range(rng.randint(1, 3))],
+        "status": rng.choice(["available", "pending", "sold"])
+    }
+
+
+def backends():
+    """
+    Returns {name: (dumps, loads)} for every backend that is installed, configured like json_codec.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    available = {"json": (encoder.encode, json.loads)}
+    try:
+        import orjson
+        available["orjson"] = (lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+    except ImportError:
+        pass
+    try:
+        import ujson
+        available["ujson"] = (lambda value: ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False),
+                              ujson.loads)
+    except ImportError:
+        pass
+    return available
+
+
+def _best_time_us(function, value, number: int, repeat: int):
+    return min(timeit.repeat(lambda: function(value), number=number, repeat=repeat)) / number * 1e6
+
+
+def benchmark(pets: int = 500, repeat: int = 5):
+    """
+    Times dumps and loads of a single pet body and of a findByStatus body with the given number
+    of pets, for every installed backend.
+
+    Returns:
+    - dict: {body name: {backend: {"dumps_us": float, "loads_us": float}}}
+    """
+    rng = random.Random(0)
+    bodies = {
+        "pet": pet_body(rng, 1),
+        f"findByStatus ({pets} pets)": [pet_body(rng, pet_id) for pet_id in range(pets)]
+    }
+    results = {}
+    for body_name, body in bodies.items():
+        text = json.dumps(body)
+        number = max(1, 20000 // (len(text) // 200 + 1))
+        results[body_name] = {
+            name: {"dumps_us": _best_time_us(dumps, body, number, repeat),
+                   "loads_us": _best_time_us(loads, text, number, repeat)}
+            for name, (dumps, loads) in backends().items()
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the JSON backends on Petstore bodies.")
+    parser.add_argument("--pets", type=int, default=500, help="pets in the findByStatus body")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for body_name, timings in benchmark(args.pets, args.repeat).items():
+        print(body_name)
+        baseline = timings["json"]["dumps_us"] + timings["json"]["loads_us"]
+        for name, timing in timings.items():
+            total = timing["dumps_us"] + timing["loads_us"]
+            print(f"  {name:<8} dumps {timing['dumps_us']:10.2f} us  loads {timing['loads_us']:10.2f} us  "
+                  f"saves {baseline - total:10.2f} us per request ({(1 - total / baseline) * 100:5.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+The JSON codec used on the request path: request bodies, response parsing and log entries.
+
+orjson or ujson is used when installed, otherwise the standard library json module. All
+backends produce the same compact output (no spaces after separators, non-ASCII characters kept,
+'/' not escaped), so logs and request bodies look the same whichever backend is installed.
+Pretty-printed output (indent=...) and places that compare against formatted text, such as the
+header checks in api_test, keep using the json module directly.
+"""
+import json
+from test.helpers.profiling import profiled
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson is optional
+    ujson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def dumps_bytes(value) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps(value) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    loads = orjson.loads
+elif ujson is not None:
+    BACKEND = "ujson"
+
+    def dumps(value) -> str:
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+    def dumps_bytes(value) -> bytes:
+        return dumps(value).encode("utf-8")
+
+    loads = ujson.loads
+else:
+    BACKEND = "json"
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(value) -> str:
+        return _encoder.encode(value)
+
+    def dumps_bytes(value) -> bytes:
+        return _encoder.encode(value).encode("utf-8")
+
+    loads = json.loads
+
+
+def response_json(response):
+    """
+    Parses a response body with the codec, like response.json().
+
+    Raises:
+    - ValueError: If the body is not valid JSON (orjson and ujson errors are ValueErrors too).
+    """
+    return loads(response.content)
+
+
+# Attribute encoding and parsing to "serialization" when profiling is enabled
+dumps = profiled("serialization")(dumps)
+dumps_bytes = profiled("serialization")(dumps_bytes)
+loads = profiled("serialization")(loads)
@@ -0,0 +1,194 @@
+"""
+Spreads a load run over several machines: a controller hands a scenario and an ID range to each
+agent over TCP, starts them together and merges their histograms at the end.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.load_cluster controller add_pet --agents 2 --duration 60 --listen 0.0.0.0:7070
+    python -m test.helpers.load_cluster agent --connect controller-host:7070 --workers 8
+
+On one machine, --local-agents starts the agents as subprocesses on localhost:
+    python -m test.helpers.load_cluster controller add_pet --local-agents 2 --duration 30
+"""
+import argparse
+import multiprocessing
+import socket
+import subprocess
+import sys
+import time
+from test.helpers.histogram import merge, percentile
+from test.helpers.json_codec import dumps_bytes, loads
+from test.helpers.load_runner import DEFAULT_ID_RANGE, SCENARIOS, format_result, run_load
+
+
+def send_message(stream, message: dict):
+    """
+    Writes one message as a line of JSON.
+    """
+    stream.write(dumps_bytes(message) + b"\n")
+    stream.flush()
+
+
+def receive_message(stream, expected_type: str):
+    """
+    Reads the next message and checks its type.
+
+    Raises:
+    - ConnectionError: If the peer closed the connection or sent an unexpected message.
+    """
+    line = stream.readline()
+    if not line:
+        raise ConnectionError(f"Connection closed while waiting for '{expected_type}'")
+    message = loads(line)
+    if message.get("type") != expected_type:
+        raise ConnectionError(f"Expected '{expected_type}' but received '{message.get('type')}'")
+    return message
+
+
+def _parse_address(address: str):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _connect(address: str, retry_seconds: float = 30):
+    # Agents may be started before the controller listens, keep retrying for a while
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            return socket.create_connection(_parse_address(address))
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def merge_results(results: list):
+    """
+    Combines the run_load results of several agents into one result.
+    """
+    histogram = merge(*(result["histogram"] for result in results))
+    merged = {
+        "requests": sum(result["requests"] for result in results),
+        "errors": sum(result["errors"] for result in results),
+        "duration_s": max(result["duration_s"] for result in results),
+        "requests_per_second": round(sum(result["requests_per_second"] for result in results), 1)
+    }
+    for name, fraction in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+        value = percentile(histogram, fraction)
+        merged[name] = value / 1000 if value is not None else None
+    merged["histogram"] = histogram
+    return merged
+
+
+def run_agent(address: str, workers: int):
+    """
+    Connects to a controller, runs the scenario it sends and reports the result.
+    """
+    with _connect(address) as connection:
+        stream = connection.makefile("rwb")
+        send_message(stream, {"type": "hello", "host": socket.gethostname(), "workers": workers})
+        plan = receive_message(stream, "plan")
+        send_message(stream, {"type": "ready"})
+        receive_message(stream, "start")
+        result = run_load(plan["scenario"], workers, plan["duration"], id_range=range(*plan["ids"]),
+                          report=None)
+        send_message(stream, {"type": "result", **result})
+    return result
+
+
+def run_controller(scenario: str, agents: int, duration: float, listen: str = "127.0.0.1:7070",
+                   id_range: range = DEFAULT_ID_RANGE, timeout: float = 300):
+    """
+    Waits for agents, gives each a share of the ID range proportional to its workers, starts them
+    at the same time and merges their results.
+
+    Parameters:
+    - scenario (str): A load_runner scenario name or 'module:function', importable on every agent.
+    - agents (int): The number of agents to wait for.
+    - duration (float): How long the agents run, in seconds.
+    - listen (str): The host:port to accept agents on.
+    - id_range (range): The resource IDs of the whole run.
+    - timeout (float): How long to wait for agents to connect and report, in seconds.
+
+    Returns:
+    - tuple: (merged result, list of (agent host, result))
+    """
+    with socket.create_server(_parse_address(listen)) as server:
+        server.settimeout(timeout)
+        connections = []
+        try:
+            while len(connections) < agents:
+                connection, _ = server.accept()
+                connection.settimeout(timeout + duration)
+                stream = connection.makefile("rwb")
+                connections.append((connection, stream, receive_message(stream, "hello")))
+
+            total_workers = sum(hello["workers"] for _, _, hello in connections)
+            if len(id_range) < total_workers:
+                raise ValueError(f"The ID range {id_range} has fewer IDs than the {total_workers} workers")
+            id_start = id_range.start
+            for _, stream, hello in connections:
+                share = len(id_range) * hello["workers"] // total_workers
+                send_message(stream, {"type": "plan", "scenario": scenario, "duration": duration,
+                                      "ids": [id_start, id_start + share]})
+                id_start += share
+            for _, stream, _ in connections:
+                receive_message(stream, "ready")
+            for _, stream, _ in connections:
+                send_message(stream, {"type": "start"})
+
+            results = [(hello["host"], receive_message(stream, "result")) for _, stream, hello in connections]
+        finally:
+            for connection, stream, _ in connections:
+                stream.close()
+                connection.close()
+    return merge_results([result for _, result in results]), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a load scenario on several agents.")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    controller = subparsers.add_parser("controller")
+    controller.add_argument("scenario", help=f"one of {', '.join(SCENARIOS)} or module:function")
+    controller.add_argument("--agents", type=int, default=1)
+    controller.add_argument("--local-agents", type=int, default=0, help="start this many agents on localhost")
+    controller.add_argument("--agent-workers", type=int, default=multiprocessing.cpu_count(),
+                            help="workers per local agent")
+    controller.add_argument("--duration", type=float, default=60, help="seconds")
+    controller.add_argument("--listen", default="127.0.0.1:7070")
+    controller.add_argument("--id-start", type=int, default=DEFAULT_ID_RANGE.start)
+    controller.add_argument("--id-count", type=int, default=len(DEFAULT_ID_RANGE))
+
+    agent = subparsers.add_parser("agent")
+    agent.add_argument("--connect", default="127.0.0.1:7070")
+    agent.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args(argv)
+
+    if args.role == "agent":
+        print(format_result(run_agent(args.connect, args.workers)))
+        return 0
+
+    local_agents = []
+    if args.local_agents:
+        host, port = _parse_address(args.listen)
+        local_agents = [subprocess.Popen([sys.executable, "-m", "test.helpers.load_cluster", "agent",
+                                          "--connect", f"{host}:{port}", "--workers", str(args.agent_workers)],
+                                         stdout=subprocess.DEVNULL)
+                        for _ in range(args.local_agents)]
+    try:
+        merged, results = run_controller(args.scenario, max(args.agents, args.local_agents), args.duration,
+                                         args.listen, range(args.id_start, args.id_start + args.id_count))
+    except BaseException:
+        for process in local_agents:
+            process.kill()
+        raise
+    for process in local_agents:
+        process.wait()
+    for index, (host, result) in enumerate(results):
+        print(f"agent {index} ({host}): {format_result(result)}")
+    print(f"total: {format_result(merged)}")
+    return 1 if merged["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Drives load against the Petstore from several worker processes.
+
+Each worker runs a scenario in a loop with the basic_requests helpers and counts requests,
+errors and latencies into its own row of a shared-memory block. The coordinator reads the rows
+once per interval and prints throughput and latency percentiles, so there is no IPC per request.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.load_runner find_pets_by_status --workers 8 --duration 60
+    python -m test.helpers.load_runner my_scenarios:checkout_flow --workers 4 --duration 30
+
+Configure "per_worker_logs" and "log_sampling" in config.json for long runs, otherwise every
+request of every worker is written to the same log.
+"""
+import argparse
+import importlib
+import multiprocessing
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+from test.api.basic_requests import get, post
+from test.helpers import log_sampling
+from test.helpers.clock import now_ns
+from test.helpers.histogram import BUCKETS, bucket_index, merge, percentile
+from test.helpers.log_files import clear_worker_log_files
+from test.helpers.payload_generator import PayloadGenerator
+from test.helpers.seeding import run_seed
+from test.helpers.utils import fake, load_config, set_debug_file_name
+
+# Row layout: requests, errors, latency sum (us), then the latency histogram
+REQUESTS, ERRORS, LATENCY_SUM, HISTOGRAM = 0, 1, 2, 3
+ROW_SIZE = HISTOGRAM + BUCKETS
+STOP = 0
+DEFAULT_ID_RANGE = range(10 ** 9, 2 * 10 ** 9)
+
+
+def _cycle(ids: range):
+    if not ids:
+        raise ValueError("The ID range is empty")
+    while True:
+        yield from ids
+
+
+def _payload_stream(make_batch, ids: range, batch_size: int = 1000):
+    """
+    Yields payloads with consecutive IDs from ids, starting over at the beginning of the range.
+    """
+    if not ids:
+        raise ValueError("The ID range is empty")
+    while True:
+        for id_start in range(ids.start, ids.stop, batch_size):
+            yield from make_batch(min(batch_size, ids.stop - id_start), as_bytes=True, id_start=id_start)
+
+
+def find_pets_by_status(worker: int, ids: range):
+    return lambda: get("/v2/pet/findByStatus?status=available")
+
+
+def add_pet(worker: int, ids: range):
+    bodies = _payload_stream(PayloadGenerator(pool_size=256).pets, ids)
+    return lambda: post("/v2/pet", next(bodies), {"content-type": "application/json"})
+
+
+def add_and_fetch_pet(worker: int, ids: range):
+    pet_ids = _cycle(ids)
+    generator = PayloadGenerator(pool_size=256)
+
+    def run():
+        pet_id = next(pet_ids)
+        body = generator.pets(1, as_bytes=True, id_start=pet_id)[0]
+        return [post("/v2/pet", body, {"content-type": "application/json"}), get(f"/v2/pet/{pet_id}")]
+    return run
+
+
+def place_order(worker: int, ids: range):
+    bodies = _payload_stream(PayloadGenerator(pool_size=256).orders, ids)
+    return lambda: post("/v2/store/order", next(bodies), {"content-type": "application/json"})
+
+
+SCENARIOS = {
+    "find_pets_by_status": find_pets_by_status,
+    "add_pet": add_pet,
+    "add_and_fetch_pet": add_and_fetch_pet,
+    "place_order": place_order
+}
+
+
+def resolve_scenario(name: str):
+    """
+    Returns a scenario factory: a built-in name from SCENARIOS or 'module:function'.
+
+    A factory is called once per worker as factory(worker, ids), where ids is the worker's share
+    of the ID range, and returns the callable run for every iteration. An iteration may return a
+    response or a list of responses; any 4xx/5xx status or exception counts as an error. Counters
+    and latencies are per iteration, so a multi-request iteration counts as one request.
+    """
+    if ":" in name:
+        module_name, function_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), function_name)
+    return SCENARIOS[name]
+
+
+def _is_error(result):
+    responses = result if isinstance(result, (list, tuple)) else [result]
+    return any(response is not None and response.status_code >= 400 for response in responses)
+
+
+def _run_worker(memory, worker: int, scenario: str, ids: range, seed: int):
+    set_debug_file_name("load")
+    # Forked workers inherit the coordinator's random state; give each its own data
+    random.seed(seed + worker)
+    fake.seed_instance(seed + worker)
+    counters = memory.buf.cast("q")
+    offset = 1 + worker * ROW_SIZE
+    iteration = resolve_scenario(scenario)(worker, ids)
+    try:
+        while not counters[STOP]:
+            start = now_ns()
+            try:
+                failed = _is_error(iteration())
+            except Exception:
+                failed = True
+            latency_us = (now_ns() - start) // 1000
+            counters[offset + REQUESTS] += 1
+            counters[offset + LATENCY_SUM] += latency_us
+            counters[offset + HISTOGRAM + bucket_index(latency_us)] += 1
+            if failed:
+                counters[offset + ERRORS] += 1
+    finally:
+        # Worker processes skip atexit handlers, flush deferred log entries here
+        log_sampling.flush()
+        counters.release()
+
+
+def _read_totals(counters, workers: int):
+    rows = [counters[1 + worker * ROW_SIZE:1 + (worker + 1) * ROW_SIZE].tolist() for worker in range(workers)]
+    return merge(*rows)
+
+
+def _percentiles_ms(histogram):
+    return {name: (value / 1000 if value is not None else None) for name, value in
+            (("p50_ms", percentile(histogram, 0.5)), ("p90_ms", percentile(histogram, 0.9)),
+             ("p99_ms", percentile(histogram, 0.99)))}
+
+
+def format_interval(elapsed: float, requests: int, errors: int, seconds: float, histogram):
+    """
+    Formats one progress line: throughput, errors and latency percentiles of an interval.
+    """
+    percentiles = _percentiles_ms(histogram)
+    latencies = "  ".join(f"{name[:3]} {value:8.2f} ms" if value is not None else f"{name[:3]}        - ms"
+                          for name, value in percentiles.items())
+    return f"{elapsed:7.1f}s {requests / seconds:9.1f} req/s  errors {errors:6d}  {latencies}"
+
+
+def run_load(scenario: str, workers: int = 4, duration: float = 60, interval: float = 1.0,
+             id_range: range = DEFAULT_ID_RANGE, report=print, seed: int = None):
+    """
+    Runs a scenario in worker processes for a duration and aggregates their counters.
+
+    Parameters:
+    - scenario (str): A built-in scenario name or 'module:function' (see resolve_scenario).
+    - workers (int): The number of worker processes.
+    - duration (float): How long to run, in seconds.
+    - interval (float): How often the coordinator reports progress, in seconds.
+    - id_range (range): The resource IDs the run may use, split evenly between workers.
+    - report (callable): Receives each progress line, None disables progress output.
+    - seed (int, optional): Worker i seeds its data generators with seed + i. Defaults to the
+      run seed (PETSTORE_SEED or "seed" in config.json, see test/helpers/seeding.py).
+
+    Raises:
+    - ValueError: If id_range holds fewer IDs than there are workers.
+
+    Returns:
+    - dict: requests, errors, duration_s, requests_per_second, p50_ms, p90_ms, p99_ms and the
+      merged latency histogram (bucket counts, see test/helpers/histogram.py).
+    """
+    if len(id_range) < workers:
+        raise ValueError(f"The ID range {id_range} has fewer IDs than the {workers} workers")
+    seed = seed if seed is not None else run_seed(load_config())
+    clear_worker_log_files("load")
+    context = multiprocessing.get_context("fork")
+    memory = shared_memory.SharedMemory(create=True, size=(1 + workers * ROW_SIZE) * 8)
+    counters = memory.buf.cast("q")
+    try:
+        for index in range(len(counters)):
+            counters[index] = 0
+        share = len(id_range) // workers
+        processes = [context.Process(target=_run_worker, args=(
+            memory, worker, scenario,
+            range(id_range.start + worker * share, id_range.start + (worker + 1) * share), seed), daemon=True)
+            for worker in range(workers)]
+        started = time.monotonic()
+        for process in processes:
+            process.start()
+
+        previous, previous_time = [0] * ROW_SIZE, started
+        while True:
+            now = time.monotonic()
+            remaining = started + duration - now
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+            now = time.monotonic()
+            totals = _read_totals(counters, workers)
+            if report is not None:
+                delta = [current - before for current, before in zip(totals, previous)]
+                report(format_interval(now - started, delta[REQUESTS], delta[ERRORS], now - previous_time,
+                                       delta[HISTOGRAM:]))
+            previous, previous_time = totals, now
+
+        counters[STOP] = 1
+        for process in processes:
+            process.join()
+        elapsed = time.monotonic() - started
+        totals = _read_totals(counters, workers)
+        histogram = totals[HISTOGRAM:]
+        result = {
+            "requests": totals[REQUESTS],
+            "errors": totals[ERRORS],
+            "duration_s": round(elapsed, 3),
+            "requests_per_second": round(totals[REQUESTS] / elapsed, 1),
+            **_percentiles_ms(histogram),
+            "histogram": histogram
+        }
+    finally:
+        counters.release()
+        memory.close()
+        memory.unlink()
+    return result
+
+
+def format_result(result: dict):
+    """
+    Formats the summary of a run_load result.
+    """
+    percentiles = "  ".join(f"{name[:3]} {result[name]} ms" for name in ("p50_ms", "p90_ms", "p99_ms"))
+    return (f"{result['requests']} requests in {result['duration_s']} s "
+            f"({result['requests_per_second']} req/s), {result['errors']} errors  {percentiles}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run load against the Petstore from several processes.")
+    parser.add_argument("scenario", help=f"one of {', '.join(SCENARIOS)} or module:function")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between progress lines")
+    parser.add_argument("--id-start", type=int, default=DEFAULT_ID_RANGE.start)
+    parser.add_argument("--id-count", type=int, default=len(DEFAULT_ID_RANGE))
+    args = parser.parse_args(argv)
+
+    result = run_load(args.scenario, args.workers, args.duration, args.interval,
+                      range(args.id_start, args.id_start + args.id_count))
+    print(format_result(result))
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import atexit
+import glob
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from test.helpers.clock import now_ns
+
+LOG_DIR = os.path.join('..', 'logs')
+
+_rotation_lock = threading.Lock()
+_write_lock = threading.Lock()
+_segment_started = {}
+_compression_queue = queue.Queue()
+_compression_thread = None
+
+
+def worker_id():
+    """
+    Returns an identifier for the current worker process: the pytest-xdist worker name (gw0, gw1, ...)
+    when running under xdist, otherwise the process ID.
+    """
+    return os.environ.get("PYTEST_XDIST_WORKER") or f"pid{os.getpid()}"
+
+
+def suite_log_file(suite_name: str, per_worker: bool = False):
+    """
+    Returns the log file path for a suite, e.g. '../logs/api_pet.log'. With per_worker set, each
+    worker process gets its own file ('../logs/api_pet.gw0.log'), so parallel runs never interleave
+    entries. Worker files are combined afterwards with test/helpers/log_merge.py.
+    """
+    if per_worker:
+        return os.path.join(LOG_DIR, f"{suite_name}.{worker_id()}.log")
+    return os.path.join(LOG_DIR, f"{suite_name}.log")
+
+
+def worker_log_files(suite_name: str):
+    """
+    Lists the per-worker log files of a suite.
+    """
+    return sorted(glob.glob(os.path.join(glob.escape(LOG_DIR), f"{glob.escape(suite_name)}.*.log")))
+
+
+def clear_worker_log_files(suite_name: str = None):
+    """
+    Removes the per-worker log files, with their rotated segments, left over from earlier runs of a
+    suite, or of every suite when suite_name is None. Called once before any worker starts logging,
+    since process IDs differ between runs and a worker can only ever find its own file.
+    """
+    pattern = f"{glob.escape(suite_name)}.*.log" if suite_name else "*.*.log"
+    for log_file in glob.glob(os.path.join(glob.escape(LOG_DIR), pattern)):
+        remove_log_segments(log_file)
+        _remove_if_exists(log_file)
+
+
+def segment_paths(log_file: str):
+    """
+    Lists the rotated segments of a log file, oldest first.
+
+    Rotated segments are named <name>.log-<timestamp> and <name>.log-<timestamp>.gz once compressed.
+
+    Parameters:
+    - log_file (str): The path of the live log file (e.g. '../logs/api_pet.log').
+
+    Returns:
+    - list: The segment paths, sorted by rotation time.
+    """
+    segments = glob.glob(glob.escape(log_file) + "-*")
+    return sorted(segments, key=lambda path: os.path.basename(path).rsplit(".log-", 1)[1].replace(".gz", ""))
+
+
+def _remove_if_exists(path: str):
+    # Segments may already be gone, removed by clear_log_file or by another worker's retention
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _compress_segments():
+    while True:
+        segment, settings = _compression_queue.get()
+        try:
+            if os.path.exists(segment):
+                with open(segment, "rb") as source, gzip.open(segment + ".gz", "wb") as target:
+                    shutil.copyfileobj(source, target)
+                _remove_if_exists(segment)
+            apply_retention(segment.rsplit("-", 1)[0], settings)
+        except Exception as e:
+            # One bad segment must not stop the only compression thread
+            logging.error("Failed to compress log segment %s: %s", segment, e)
+        finally:
+            _compression_queue.task_done()
+
+
+def _wait_for_compression(timeout: float = 10):
+    """
+    Lets pending segments finish compressing before the interpreter exits, for at most timeout
+    seconds; unfinished segments stay on disk uncompressed.
+    """
+    deadline = time.monotonic() + timeout
+    with _compression_queue.all_tasks_done:
+        while _compression_queue.unfinished_tasks and _compression_thread.is_alive():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            _compression_queue.all_tasks_done.wait(remaining)
+
+
+def _start_compression_thread():
+    global _compression_thread
+    if _compression_thread is None:
+        _compression_thread = threading.Thread(target=_compress_segments, daemon=True)
+        _compression_thread.start()
+        atexit.register(_wait_for_compression)
+
+
+def apply_retention(log_file: str, settings: dict):
+    """
+    Deletes rotated segments beyond the configured retention count or age.
+
+    Parameters:
+    - log_file (str): The path of the live log file.
+    - settings (dict): The "log_rotation" config section.
+    """
+    segments = segment_paths(log_file)
+    retention_count = settings.get("retention_count")
+    if retention_count is not None and len(segments) > retention_count:
+        for segment in segments[:len(segments) - retention_count]:
+            _remove_if_exists(segment)
+        segments = segments[len(segments) - retention_count:]
+
+    retention_days = settings.get("retention_days")
+    if retention_days is not None:
+        # File modification times are wall-clock, so the cutoff has to be too
+        cutoff = time.time() - retention_days * 86400
+        for segment in segments:
+            try:
+                expired = os.path.getmtime(segment) < cutoff
+            except FileNotFoundError:
+                continue
+            if expired:
+                _remove_if_exists(segment)
+
+
+def rotate_if_needed(log_file: str, settings: dict):
+    """
+    Rotates the log file when it is bigger or older than the configured limits.
+
+    The log file is renamed to <name>.log-<timestamp> and compressed on a background thread,
+    so the caller only pays for a stat() and, rarely, a rename.
+
+    Configured with the "log_rotation" section of config.json, for example:
+        "log_rotation": {"max_bytes": 104857600, "max_age_seconds": 3600, "compress": true,
+                         "retention_count": 20, "retention_days": 7}
+
+    Parameters:
+    - log_file (str): The path of the live log file.
+    - settings (dict): The "log_rotation" config section, None disables rotation.
+    """
+    if not settings:
+        return
+
+    now = now_ns()
+    started = _segment_started.setdefault(log_file, now)
+    max_bytes = settings.get("max_bytes")
+    max_age_seconds = settings.get("max_age_seconds")
+    try:
+        size = os.path.getsize(log_file)
+    except OSError:
+        return
+    too_big = max_bytes is not None and size >= max_bytes
+    too_old = max_age_seconds is not None and now - started >= max_age_seconds * 1_000_000_000
+    if not (too_big or too_old) or size == 0:
+        return
+
+    with _rotation_lock:
+        # Another thread may have rotated while we were waiting for the lock
+        if not os.path.exists(log_file) or os.path.getsize(log_file) < size:
+            return
+        segment = f"{log_file}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}"
+        os.rename(log_file, segment)
+        _segment_started[log_file] = now
+
+    if settings.get("compress", True):
+        _start_compression_thread()
+        _compression_queue.put((segment, settings))
+    else:
+        apply_retention(log_file, settings)
+
+
+def append_log_entry(log_file: str, log_entry: str, rotation: dict = None):
+    """
+    Appends an entry to a log file, rotating the file first when needed. Threads of one process
+    share the file; the lock keeps their entries from tearing or landing in a rotated segment.
+
+    Parameters:
+    - log_file (str): The path of the live log file.
+    - log_entry (str): The formatted entry.
+    - rotation (dict, optional): The "log_rotation" config section (see rotate_if_needed).
+    """
+    with _write_lock:
+        rotate_if_needed(log_file, rotation)
+        with open(log_file, 'a', encoding='utf-8') as file:
+            file.write(log_entry)
+
+
+def remove_log_segments(log_file: str):
+    """
+    Deletes all rotated segments of a log file.
+    """
+    for segment in segment_paths(log_file):
+        _remove_if_exists(segment)
+
+
+def iter_log_lines(log_file: str):
+    """
+    Yields the lines of a log file and all of its rotated segments in chronological order,
+    reading compressed segments transparently.
+
+    Parameters:
+    - log_file (str): The path of the live log file (e.g. '../logs/api_pet.log').
+    """
+    for path in segment_paths(log_file) + [log_file]:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as file:
+                yield from file
+        except FileNotFoundError:
+            # The segment was compressed or removed while we were reading
+            if not path.endswith(".gz") and os.path.exists(path + ".gz"):
+                with gzip.open(path + ".gz", "rt", encoding="utf-8") as file:
+                    yield from file
+
+
+def format_log_entry(entry: dict):
+    """
+    Turns a parsed entry back into the text written by api_logger.
+    """
+    return "{\n" + "".join(f"\t{key}: {value}\n" for key, value in entry.items()) + "}\n"
+
+
+def iter_log_entries(log_file: str, where=None):
+    """
+    Parses the entries written by api_logger from a log file and its rotated segments.
+
+    Parameters:
+    - log_file (str): The path of the live log file.
+    - where (callable, optional): Only entries for which where(entry) is true are returned.
+
+    Returns:
+    - generator: One dict per entry, mapping field names (endpoint, url, time, ...) to strings.
+    """
+    entry = None
+    for line in iter_log_lines(log_file):
+        line = line.rstrip("\n")
+        if line == "{":
+            entry = {}
+        elif line == "}":
+            if entry is not None and (where is None or where(entry)):
+                yield entry
+            entry = None
+        elif entry is not None and line.startswith("\t"):
+            key, _, value = line[1:].partition(": ")
+            entry[key] = value
@@ -0,0 +1,62 @@
+"""
+Merges the per-worker log files of a suite into one time-ordered log.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.log_merge api_pet
+    python -m test.helpers.log_merge api_pet --output ../logs/api_pet.merged.txt
+"""
+import argparse
+import heapq
+import os
+import sys
+from test.helpers.log_files import LOG_DIR, worker_log_files, iter_log_entries, format_log_entry
+
+
+def _timed_entries(log_file: str):
+    for entry in iter_log_entries(log_file):
+        yield entry.get("time", ""), format_log_entry(entry)
+
+
+def merge_log_files(log_files: list, output_file: str):
+    """
+    K-way merges log files into one file ordered by entry time.
+
+    Only one entry per input file is held in memory at a time, so arbitrarily large logs can be
+    merged. Each input is expected to be in time order already, which holds for per-worker logs.
+
+    Parameters:
+    - log_files (list): The log files to merge (their rotated segments are included).
+    - output_file (str): The merged log file, replaced atomically when the merge completes.
+
+    Returns:
+    - int: The number of entries written.
+    """
+    count = 0
+    temporary_file = output_file + ".tmp"
+    streams = [_timed_entries(log_file) for log_file in log_files]
+    with open(temporary_file, "w", encoding="utf-8") as file:
+        for _, log_entry in heapq.merge(*streams, key=lambda item: item[0]):
+            file.write(log_entry)
+            count += 1
+    os.replace(temporary_file, output_file)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge per-worker suite logs into one time-ordered log.")
+    parser.add_argument("suite_name", help="the suite name, e.g. api_pet")
+    parser.add_argument("--output", help="the merged file, defaults to ../logs/<suite_name>.log")
+    args = parser.parse_args(argv)
+
+    log_files = worker_log_files(args.suite_name)
+    if not log_files:
+        print(f"No worker log files found for suite: {args.suite_name}")
+        return 1
+    output_file = args.output or os.path.join(LOG_DIR, f"{args.suite_name}.log")
+    count = merge_log_files(log_files, output_file)
+    print(f"Merged {count} entries from {len(log_files)} worker logs into {output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
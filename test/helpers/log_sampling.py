@@ -0,0 +1,124 @@
+import atexit
+import heapq
+import itertools
+import threading
+import time
+from test.helpers.log_files import append_log_entry
+from test.helpers.metrics import endpoint_key
+
+WRITE = "write"
+SKIP = "skip"
+DEFER = "defer"
+
+_lock = threading.Lock()
+_counter = itertools.count()
+_sequence = itertools.count()
+_slowest = {}
+_rotation = {}
+_budget = {"tokens": None, "last": None}
+_flush_registered = False
+
+
+def _is_failure(settings: dict, status_code: int):
+    return status_code is None or status_code >= settings.get("failure_status_min", 400)
+
+
+def decide(settings: dict, log_file: str, method: str, endpoint: str, status_code: int, duration_ms: float):
+    """
+    Decides whether a request gets a log entry, before the (expensive) entry is built.
+
+    Sampling is configured with the "log_sampling" section of config.json:
+    - {"policy": "one_in_n", "n": 100}: every n-th request.
+    - {"policy": "failures"}: only requests with a status >= failure_status_min (default 400).
+    - {"policy": "slowest_k", "k": 10}: the k slowest requests per endpoint, written by flush().
+    - {"policy": "bytes_per_second", "bytes_per_second": 1000000}: a log volume budget.
+    Failures are always logged by the one_in_n and bytes_per_second policies unless
+    "always_log_failures" is false.
+
+    Parameters:
+    - settings (dict): The "log_sampling" config section.
+    - log_file (str): The log file the entry would be written to.
+    - method (str): The HTTP method.
+    - endpoint (str): The endpoint requested.
+    - status_code (int): The response status code.
+    - duration_ms (float): The request duration in milliseconds.
+
+    Returns:
+    - str: WRITE, SKIP, or DEFER (keep the entry in memory with defer() until flush()).
+    """
+    policy = settings.get("policy", "all")
+    if policy == "all":
+        return WRITE
+
+    failure = _is_failure(settings, status_code)
+    if policy == "failures":
+        return WRITE if failure else SKIP
+    if failure and settings.get("always_log_failures", True) and policy != "slowest_k":
+        return WRITE
+
+    if policy == "one_in_n":
+        return WRITE if next(_counter) % settings.get("n", 100) == 0 else SKIP
+
+    if policy == "bytes_per_second":
+        rate = settings.get("bytes_per_second", 1000000)
+        with _lock:
+            now = time.monotonic()
+            if _budget["tokens"] is None:
+                _budget["tokens"], _budget["last"] = rate, now
+            _budget["tokens"] = min(rate, _budget["tokens"] + (now - _budget["last"]) * rate)
+            _budget["last"] = now
+            return WRITE if _budget["tokens"] > 0 else SKIP
+
+    if policy == "slowest_k":
+        with _lock:
+            heap = _slowest.get((log_file, endpoint_key(method, endpoint)))
+            if heap is not None and len(heap) >= settings.get("k", 10) and duration_ms <= heap[0][0]:
+                return SKIP
+        return DEFER
+
+    raise ValueError(f"Unknown log sampling policy: {policy}")
+
+
+def charge(settings: dict, entry_size: int):
+    """
+    Takes the size of a written entry from the bytes_per_second budget.
+    """
+    if settings.get("policy") == "bytes_per_second":
+        with _lock:
+            _budget["tokens"] -= entry_size
+
+
+def defer(settings: dict, log_file: str, method: str, endpoint: str, duration_ms: float, log_entry: str,
+          rotation: dict = None):
+    """
+    Keeps an entry in the per-endpoint slowest-k set until flush() writes it. rotation is the
+    "log_rotation" config section the entry is written with.
+    """
+    global _flush_registered
+    with _lock:
+        heap = _slowest.setdefault((log_file, endpoint_key(method, endpoint)), [])
+        _rotation[log_file] = rotation
+        item = (duration_ms, next(_sequence), log_entry)
+        if len(heap) < settings.get("k", 10):
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+        if not _flush_registered:
+            atexit.register(flush)
+            _flush_registered = True
+
+
+def flush():
+    """
+    Writes the deferred slowest-k entries to their log files, in the order they were recorded,
+    through the same locked and rotating writer as api_logger.
+    """
+    with _lock:
+        by_file = {}
+        for (log_file, _), heap in _slowest.items():
+            by_file.setdefault(log_file, []).extend(heap)
+        _slowest.clear()
+
+    for log_file, items in by_file.items():
+        for _, _, log_entry in sorted(items, key=lambda item: item[1]):
+            append_log_entry(log_file, log_entry, _rotation.get(log_file))
@@ -0,0 +1,187 @@
+"""
+Indexed SQLite store for the request logs written by api_logger.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.log_store ingest ../logs/api_pet.log --run nightly
+    python -m test.helpers.log_store slowest --method PUT --endpoint /v2/pet --limit 20
+    python -m test.helpers.log_store status --min 500 --max 599 --run last
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from test.helpers.log_files import iter_log_entries
+from test.helpers.metrics import endpoint_key
+
+DEFAULT_DB = os.path.join('..', 'logs', 'requests.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    suite TEXT,
+    time TEXT,
+    method TEXT,
+    endpoint TEXT,
+    route TEXT,
+    status INTEGER,
+    duration_ms INTEGER,
+    url TEXT,
+    payload TEXT,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS requests_route_duration ON requests (route, method, duration_ms);
+CREATE INDEX IF NOT EXISTS requests_duration ON requests (duration_ms);
+CREATE INDEX IF NOT EXISTS requests_run_status ON requests (run, status);
+CREATE INDEX IF NOT EXISTS requests_status ON requests (status);
+CREATE INDEX IF NOT EXISTS requests_time ON requests (time);
+"""
+
+INSERT_REQUEST = ("INSERT INTO requests (run, suite, time, method, endpoint, route, status, duration_ms, url, "
+                  "payload, response) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def connect(db_path: str = DEFAULT_DB):
+    """
+    Opens the log store, creating the tables and indexes if needed.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _to_row(run: str, suite: str, entry: dict):
+    method = entry.get("method") or entry.get("CURL", "curl -svX GET").split()[2]
+    endpoint = entry.get("endpoint", "")
+    status = entry.get("status")
+    duration = entry.get("duration", "").split(" ")[0]
+    return (run, suite, entry.get("time"), method, endpoint, endpoint_key(method, endpoint).split(" ", 1)[1],
+            int(status) if status and status.isdigit() else None,
+            int(duration) if duration.isdigit() else None,
+            entry.get("url"), entry.get("payload"), entry.get("response"))
+
+
+def ingest(log_file: str, db_path: str = DEFAULT_DB, run: str = None, batch_size: int = 10000):
+    """
+    Loads every entry of a log file (and its rotated segments) into the log store.
+
+    Parameters:
+    - log_file (str): The path of the suite log (e.g. '../logs/api_pet.log').
+    - db_path (str): The SQLite database file.
+    - run (str, optional): The run name, defaults to the ingestion timestamp.
+    - batch_size (int): The number of rows inserted per executemany call.
+
+    Returns:
+    - int: The number of entries ingested.
+    """
+    run = run or datetime.now().strftime("%Y%m%dT%H%M%S")
+    suite = os.path.basename(log_file).split(".log")[0]
+    connection = connect(db_path)
+    count = 0
+    with connection:
+        connection.execute("INSERT OR REPLACE INTO runs (run, ingested_at) VALUES (?, ?)",
+                           (run, datetime.now().isoformat()))
+        batch = []
+        for entry in iter_log_entries(log_file):
+            batch.append(_to_row(run, suite, entry))
+            if len(batch) >= batch_size:
+                connection.executemany(INSERT_REQUEST, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.executemany(INSERT_REQUEST, batch)
+            count += len(batch)
+    connection.close()
+    return count
+
+
+def _resolve_run(connection, run: str):
+    if run == "last":
+        row = connection.execute("SELECT run FROM runs ORDER BY ingested_at DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+    return run
+
+
+def slowest(connection, method: str = None, endpoint: str = None, run: str = None, limit: int = 20):
+    """
+    Returns the slowest requests, optionally for one method and endpoint route (e.g. PUT /v2/pet).
+    """
+    conditions, params = [], []
+    if method:
+        conditions.append("method = ?")
+        params.append(method.upper())
+    if endpoint:
+        conditions.append("route = ?")
+        params.append(endpoint_key("GET", endpoint).split(" ", 1)[1])
+    run = _resolve_run(connection, run)
+    if run:
+        conditions.append("run = ?")
+        params.append(run)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return connection.execute(f"SELECT time, method, endpoint, status, duration_ms FROM requests {where} "
+                              f"ORDER BY duration_ms DESC LIMIT ?", params + [limit]).fetchall()
+
+
+def by_status(connection, minimum: int, maximum: int, run: str = None, limit: int = 1000):
+    """
+    Returns the requests whose status code is between minimum and maximum (inclusive).
+    """
+    params = [minimum, maximum]
+    run = _resolve_run(connection, run)
+    run_condition = ""
+    if run:
+        run_condition = "AND run = ? "
+        params.append(run)
+    return connection.execute(f"SELECT time, method, endpoint, status, duration_ms FROM requests "
+                              f"WHERE status BETWEEN ? AND ? {run_condition}ORDER BY time LIMIT ?",
+                              params + [limit]).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the request logs written by api_logger.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="load log files into the store")
+    ingest_parser.add_argument("log_files", nargs="+")
+    ingest_parser.add_argument("--run", help="run name, defaults to the current timestamp")
+
+    slowest_parser = commands.add_parser("slowest", help="list the slowest requests")
+    slowest_parser.add_argument("--method")
+    slowest_parser.add_argument("--endpoint", help="endpoint or route, e.g. /v2/pet/1234 or /v2/pet/:id")
+    slowest_parser.add_argument("--run", help="run name or 'last'")
+    slowest_parser.add_argument("--limit", type=int, default=20)
+
+    status_parser = commands.add_parser("status", help="list requests by status code range")
+    status_parser.add_argument("--min", type=int, default=500)
+    status_parser.add_argument("--max", type=int, default=599)
+    status_parser.add_argument("--run", default="last", help="run name or 'last'")
+    status_parser.add_argument("--limit", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        run = args.run or datetime.now().strftime("%Y%m%dT%H%M%S")
+        for log_file in args.log_files:
+            print(f"Ingested {ingest(log_file, args.db, run)} entries from {log_file} (run {run})")
+        return 0
+
+    connection = connect(args.db)
+    if args.command == "slowest":
+        rows = slowest(connection, args.method, args.endpoint, args.run, args.limit)
+    else:
+        rows = by_status(connection, args.min, args.max, args.run, args.limit)
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+    connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+def endpoint_key(method: str, endpoint: str):
+    """
+    Builds the aggregation key for a request, e.g. "GET /v2/pet/:id" for "/v2/pet/1234".
+    """
+    path = urlsplit(endpoint).path
+    segments = [":id" if segment.isdigit() else segment for segment in path.split("/")]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+def record(method: str, endpoint: str, duration_ms: float, **values):
+    """
+    Adds one request to the per-endpoint metrics.
+
+    Parameters:
+    - method (str): The HTTP method (e.g., 'GET').
+    - endpoint (str): The endpoint requested, concrete IDs and query strings are folded together.
+    - duration_ms (float): The request duration in milliseconds.
+    - values: Additional numeric values to sum per endpoint (e.g. wire_bytes=512). Values named
+      *_ms are also averaged in the metrics summary.
+    """
+    key = endpoint_key(method, endpoint)
+    with _lock:
+        entry = _metrics.get(key)
+        if entry is None:
+            entry = _metrics[key] = {"count": 0, "duration_ms": 0.0, "max_duration_ms": 0.0}
+        entry["count"] += 1
+        entry["duration_ms"] += duration_ms
+        entry["max_duration_ms"] = max(entry["max_duration_ms"], duration_ms)
+        for name, value in values.items():
+            if value is not None:
+                entry[name] = entry.get(name, 0) + value
+                # Timings that only some requests have (decode_ms, phase timings) are averaged
+                # over the requests that had them
+                if name.endswith("_ms"):
+                    entry[f"{name}_samples"] = entry.get(f"{name}_samples", 0) + 1
+
+
+def add_counts(method: str, endpoint: str, **counts):
+    """
+    Adds counts to the per-endpoint metrics without counting a request, e.g. schema_mismatches=1
+    for a response found to be outside the schema after it was recorded.
+    """
+    key = endpoint_key(method, endpoint)
+    with _lock:
+        entry = _metrics.get(key)
+        if entry is None:
+            entry = _metrics[key] = {"count": 0, "duration_ms": 0.0, "max_duration_ms": 0.0}
+        for name, value in counts.items():
+            entry[name] = entry.get(name, 0) + value
+
+
+def snapshot():
+    """
+    Returns a copy of the current per-endpoint metrics.
+    """
+    with _lock:
+        return {key: dict(entry) for key, entry in _metrics.items()}
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
+
+
+def write_metrics_summary(suite_name: str):
+    """
+    Writes the per-endpoint metrics to ../logs/<suite_name>.metrics.json.
+
+    Args:
+        suite_name (str): The name of the test suite (e.g. 'api_pet').
+    """
+    summary = snapshot()
+    for entry in summary.values():
+        if entry["count"]:
+            entry["avg_duration_ms"] = round(entry["duration_ms"] / entry["count"], 3)
+        for name in [key for key in entry if key.endswith("_ms_samples")]:
+            timing = name[:-len("_samples")]
+            entry[f"avg_{timing}"] = round(entry[timing] / entry[name], 3)
+        if entry.get("decoded_bytes"):
+            entry["compression_ratio"] = round(entry.get("wire_bytes", 0) / entry["decoded_bytes"], 3)
+
+    log_dir = os.path.join('..', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"{suite_name}.metrics.json"), "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2, sort_keys=True)
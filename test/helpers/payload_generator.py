@@ -0,0 +1,183 @@
+import random
+from datetime import datetime
+from faker import Faker
+from test.helpers.json_codec import dumps_bytes
+from test.helpers.profiling import profiled
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, random.Random draws the batch columns instead
+    numpy = None
+
+PET_CATEGORIES = ["Dog", "Cat", "Bird", "Fish", "Reptile"]
+PET_STATUSES = ["available", "pending", "sold"]
+
+PET_TEMPLATE = b'{"id":%d,"category":{"id":%d,"name":%s},"name":%s,"photoUrls":%s,"tags":%s,"status":%s}'
+ORDER_TEMPLATE = b'{"id":%d,"petId":%d,"quantity":%d,"shipDate":%s,"status":"placed","complete":%s}'
+USER_TEMPLATE = (b'{"id":%d,"username":%s,"firstName":%s,"lastName":%s,"email":%s,"password":%s,'
+                 b'"phone":%s,"userStatus":0}')
+
+
+def _encoded(values):
+    return [dumps_bytes(value) for value in values]
+
+
+class PayloadGenerator:
+    """
+    Generates pet, order and user request payloads in batches, for load runs that need far more
+    payloads than generate_random_*_data can produce one call at a time.
+
+    Faker is only called while building fixed-size pools of names, URLs, tags, e-mails, passwords
+    and phone numbers. A batch of N payloads then draws its IDs and pool indexes as whole columns
+    (NumPy arrays when numpy is installed) and fills byte templates with pre-encoded JSON
+    fragments, so no JSON encoder runs per payload.
+
+    Payloads use the request field names of the Petstore API (petId, shipDate, firstName, ...).
+    Pools and batches are drawn from the seed only, so two generators with the same seed produce
+    the same payloads. Without a seed, one is drawn from the global random module, so generators
+    created inside a seeded test are reproducible too.
+    """
+
+    def __init__(self, pool_size: int = 1024, seed: int = None):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self._random = random.Random(self.seed)
+        self._numpy_random = numpy.random.default_rng(self.seed) if numpy is not None else None
+        # A private Faker, so the pools depend only on the seed and leave the shared fake untouched
+        fake = Faker()
+        fake.seed_instance(self.seed)
+
+        first_names = [fake.first_name() for _ in range(pool_size)]
+        last_names = [fake.last_name() for _ in range(pool_size)]
+        photo_urls = [[fake.url() for _ in range(self._random.randint(1, 3))] for _ in range(pool_size)]
+        tags = [[{"id": self._random.randint(1, 10000), "name": fake.word()} for _ in range(self._random.randint(1, 3))]
+                for _ in range(pool_size)]
+        self.pools = {
+            "first_name": first_names,
+            "last_name": last_names,
+            "username": [first[0] + last for first, last in zip(first_names, last_names)],
+            "email": [fake.email(domain="test.com") for _ in range(pool_size)],
+            "password": [fake.password(length=12, special_chars=True, upper_case=True) for _ in range(pool_size)],
+            "phone": [fake.phone_number() for _ in range(pool_size)],
+            "photo_urls": photo_urls,
+            "tags": tags,
+            "category": PET_CATEGORIES,
+            "status": PET_STATUSES
+        }
+        self.encoded_pools = {name: _encoded(values) for name, values in self.pools.items()}
+
+    def _integers(self, low: int, high: int, count: int):
+        """
+        Draws count integers in [low, high] as a list.
+        """
+        if self._numpy_random is not None:
+            return self._numpy_random.integers(low, high + 1, count).tolist()
+        return self._random.choices(range(low, high + 1), k=count)
+
+    def _ids(self, count: int, id_start: int = None):
+        if id_start is not None:
+            return list(range(id_start, id_start + count))
+        return self._integers(1, 10000, count)
+
+    def _indexes(self, pool: str, count: int):
+        return self._integers(0, len(self.pools[pool]) - 1, count)
+
+    @profiled("data_generation")
+    def pets(self, count: int, as_bytes: bool = False, id_start: int = None):
+        """
+        Generates pet payloads for POST/PUT /v2/pet.
+
+        Parameters:
+        - count (int): The number of payloads.
+        - as_bytes (bool): Return serialized JSON bodies instead of dicts.
+        - id_start (int, optional): Use consecutive IDs from id_start instead of random ones.
+
+        Returns:
+        - list: The payloads, as dicts or as bytes.
+        """
+        ids = self._ids(count, id_start)
+        category_ids = self._integers(1, 10000, count)
+        columns = [self._indexes(pool, count) for pool in ("category", "first_name", "photo_urls", "tags", "status")]
+        if as_bytes:
+            category, name, photo_urls, tags, status = (self.encoded_pools[pool] for pool in
+                                                         ("category", "first_name", "photo_urls", "tags", "status"))
+            return [PET_TEMPLATE % (pet_id, category_id, category[c], name[n], photo_urls[p], tags[t], status[s])
+                    for pet_id, category_id, c, n, p, t, s in zip(ids, category_ids, *columns)]
+
+        pools = self.pools
+        return [{
+            "id": pet_id,
+            "category": {"id": category_id, "name": pools["category"][c]},
+            "name": pools["first_name"][n],
+            "photoUrls": list(pools["photo_urls"][p]),
+            "tags": [dict(tag) for tag in pools["tags"][t]],
+            "status": pools["status"][s]
+        } for pet_id, category_id, c, n, p, t, s in zip(ids, category_ids, *columns)]
+
+    @profiled("data_generation")
+    def orders(self, count: int, as_bytes: bool = False, id_start: int = None, pet_ids: list = None):
+        """
+        Generates order payloads for POST /v2/store/order. All orders of a batch share the ship
+        date of the moment the batch was generated.
+
+        Parameters:
+        - count (int): The number of payloads.
+        - as_bytes (bool): Return serialized JSON bodies instead of dicts.
+        - id_start (int, optional): Use consecutive IDs from id_start instead of random ones.
+        - pet_ids (list, optional): The pet ID of each order, random IDs if None.
+
+        Returns:
+        - list: The payloads, as dicts or as bytes.
+        """
+        ids = self._ids(count, id_start)
+        pet_ids = pet_ids if pet_ids is not None else self._integers(1, 10000, count)
+        quantities = self._integers(1, 5, count)
+        completes = self._integers(0, 1, count)
+        ship_date = datetime.utcnow().isoformat()[:-3] + '+0000'
+        if as_bytes:
+            encoded_ship_date = dumps_bytes(ship_date)
+            return [ORDER_TEMPLATE % (order_id, pet_id, quantity, encoded_ship_date, b"true" if complete else b"false")
+                    for order_id, pet_id, quantity, complete in zip(ids, pet_ids, quantities, completes)]
+
+        return [{
+            "id": order_id,
+            "petId": pet_id,
+            "quantity": quantity,
+            "shipDate": ship_date,
+            "status": "placed",
+            "complete": bool(complete)
+        } for order_id, pet_id, quantity, complete in zip(ids, pet_ids, quantities, completes)]
+
+    @profiled("data_generation")
+    def users(self, count: int, as_bytes: bool = False, id_start: int = None):
+        """
+        Generates user payloads for POST /v2/user. Usernames come from the name pool, so they
+        repeat once count exceeds the pool size.
+
+        Parameters:
+        - count (int): The number of payloads.
+        - as_bytes (bool): Return serialized JSON bodies instead of dicts.
+        - id_start (int, optional): Use consecutive IDs from id_start instead of random ones.
+
+        Returns:
+        - list: The payloads, as dicts or as bytes.
+        """
+        ids = self._ids(count, id_start)
+        names = self._indexes("first_name", count)
+        columns = [self._indexes(pool, count) for pool in ("email", "password", "phone")]
+        if as_bytes:
+            username, first_name, last_name, email, password, phone = (
+                self.encoded_pools[pool] for pool in ("username", "first_name", "last_name", "email", "password", "phone"))
+            return [USER_TEMPLATE % (user_id, username[n], first_name[n], last_name[n], email[e], password[p], phone[f])
+                    for user_id, n, e, p, f in zip(ids, names, *columns)]
+
+        pools = self.pools
+        return [{
+            "id": user_id,
+            "username": pools["username"][n],
+            "firstName": pools["first_name"][n],
+            "lastName": pools["last_name"][n],
+            "email": pools["email"][e],
+            "password": pools["password"][p],
+            "phone": pools["phone"][f],
+            "userStatus": 0
+        } for user_id, n, e, p, f in zip(ids, names, *columns)]
@@ -0,0 +1,126 @@
+"""
+Breaks the duration of a request into phases: DNS lookup, TCP connect, TLS handshake, sending the
+request, waiting for the first response byte (ttfb) and downloading the body.
+
+The timestamps come from urllib3 connection subclasses mounted through PhaseTimingAdapter and are
+kept per thread between start() and finish().
+"""
+import socket
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from test.helpers.clock import now_ns
+
+PHASES = ("dns", "connect", "tls", "send", "ttfb", "download")
+
+_timestamps = threading.local()
+
+
+def _mark(name: str):
+    marks = getattr(_timestamps, "marks", None)
+    if marks is not None:
+        marks[name] = now_ns()
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        # Resolve separately so DNS and TCP connect are timed apart; urllib3 then connects to the
+        # resolved address while self.host still drives SNI and the Host header
+        _mark("dns_start")
+        dns_host = self._dns_host
+        try:
+            address = socket.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            address = dns_host  # let urllib3 raise its usual NewConnectionError
+        _mark("dns_end")
+        self._dns_host = address
+        try:
+            connection = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        _mark("connect_end")
+        return connection
+
+    def getresponse(self, *args, **kwargs):
+        _mark("request_sent")
+        response = super().getresponse(*args, **kwargs)
+        _mark("headers_received")
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        super().connect()
+        _mark("tls_end")
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PhaseTimingAdapter(HTTPAdapter):
+    """
+    A transport adapter whose connections record when each phase of a request ends: DNS lookup,
+    TCP connect, TLS handshake, request sent, response headers received.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                   "https": TimedHTTPSConnectionPool}
+
+
+def start():
+    """
+    Starts recording phase timestamps for a request sent from this thread.
+    """
+    _timestamps.marks = {"start": now_ns()}
+
+
+def finish():
+    """
+    Stops recording and returns the phase durations of the request.
+
+    Phases of a reused connection (dns, connect, tls) are left out, as is tls for plain HTTP.
+    When a request was redirected, the phases of the last hop are reported.
+
+    Returns:
+    - dict: {phase: milliseconds} for dns, connect, tls, send, ttfb (waiting for the response
+      headers) and download (reading the body).
+    """
+    marks = getattr(_timestamps, "marks", None)
+    _timestamps.marks = None
+    end = now_ns()
+    phases = {}
+    if not marks:
+        return phases
+
+    def span(phase, first, last):
+        if first in marks and last in marks:
+            phases[phase] = round((marks[last] - marks[first]) / 1e6, 3)
+
+    span("dns", "dns_start", "dns_end")
+    span("connect", "dns_end", "connect_end")
+    span("tls", "connect_end", "tls_end")
+    connected = next(mark for mark in ("tls_end", "connect_end", "start") if mark in marks)
+    span("send", connected, "request_sent")
+    span("ttfb", "request_sent", "headers_received")
+    if "headers_received" in marks:
+        phases["download"] = round((end - marks["headers_received"]) / 1e6, 3)
+    return phases
+
+
+def format_phases(phases: dict):
+    """
+    Formats phase durations for the log, e.g. 'dns 1.2 / connect 20.5 / ttfb 80.1 / download 0.4 ms'.
+    """
+    return " / ".join(f"{phase} {phases[phase]:.1f}" for phase in PHASES if phase in phases) + " ms"
@@ -0,0 +1,203 @@
+"""
+Opt-in profiling of the framework's own overhead.
+
+Helpers decorated with profiled(category) record the CPU time (thread_time) and wall time spent
+in them per test. Time is exclusive: a category nested in another one, such as serialization
+inside api_logger, is only counted for the inner category. Whatever a test spends outside every
+category (the spec's own code and fixtures) is counted as "other". network_wait covers the whole
+requests call, so its CPU time is the HTTP client's own work and the rest of its wall time is
+spent waiting for the server.
+
+Categories: data_generation, serialization, network_wait, api_test, schema_validation and
+api_logger. Enable with "profiling": {"enabled": true} in config.json; the run summary is written
+to ../logs/profile.json and, with "collapsed_stacks": true, the category stacks weighted by CPU
+microseconds to ../logs/profile.collapsed for flamegraph.pl or speedscope.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from test.helpers.clock import now_ns
+from test.helpers.log_files import LOG_DIR, worker_id
+
+CATEGORIES = ("data_generation", "serialization", "network_wait", "api_test", "schema_validation",
+              "api_logger", "other")
+NO_TEST = "(no test)"
+
+_enabled = False
+_current_test = NO_TEST
+_local = threading.local()
+_lock = threading.Lock()
+# {(test, category path): [calls, cpu_ns, wall_ns]}
+_totals = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Drops everything recorded so far.
+    """
+    with _lock:
+        _totals.clear()
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _enter(category: str):
+    _stack().append([category, time.thread_time_ns(), now_ns(), 0, 0])
+
+
+def _exit():
+    stack = _stack()
+    category, cpu_start, wall_start, child_cpu, child_wall = stack[-1]
+    cpu = time.thread_time_ns() - cpu_start
+    wall = now_ns() - wall_start
+    path = tuple(frame[0] for frame in stack)
+    stack.pop()
+    if stack:
+        stack[-1][3] += cpu
+        stack[-1][4] += wall
+    with _lock:
+        entry = _totals.setdefault((_current_test, path), [0, 0, 0])
+        entry[0] += 1
+        entry[1] += cpu - child_cpu
+        entry[2] += wall - child_wall
+
+
+def profiled(category: str):
+    """
+    Decorates a helper so its calls are attributed to a category while profiling is enabled.
+    When it is disabled the wrapper only checks a flag.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            _enter(category)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _exit()
+        return wrapper
+    return decorate
+
+
+def begin_test(test: str):
+    """
+    Starts attributing time to a test; time outside every category counts as "other".
+    """
+    global _current_test
+    _current_test = test
+    if _enabled:
+        _enter("other")
+
+
+def end_test():
+    global _current_test
+    if _enabled:
+        _exit()
+    _current_test = NO_TEST
+
+
+def summary():
+    """
+    Aggregates the recorded time per test and per category.
+
+    Returns:
+    - dict: {"categories": {category: {calls, cpu_ms, wall_ms}}, "tests": {test: {cpu_ms, wall_ms,
+      framework_cpu_ms, network_wait_ms, categories}}}. framework_cpu_ms is the CPU time of every
+      category except network_wait and other, i.e. what the framework itself costs a test.
+    """
+    with _lock:
+        totals = {key: list(value) for key, value in _totals.items()}
+
+    def add(categories, category, calls, cpu_ns, wall_ns):
+        entry = categories.setdefault(category, {"calls": 0, "cpu_ms": 0.0, "wall_ms": 0.0})
+        entry["calls"] += calls
+        entry["cpu_ms"] += cpu_ns / 1e6
+        entry["wall_ms"] += wall_ns / 1e6
+
+    run_categories, tests = {}, {}
+    for (test, path), (calls, cpu_ns, wall_ns) in totals.items():
+        add(run_categories, path[-1], calls, cpu_ns, wall_ns)
+        add(tests.setdefault(test, {"categories": {}})["categories"], path[-1], calls, cpu_ns, wall_ns)
+
+    for test in tests.values():
+        categories = test["categories"]
+        test["cpu_ms"] = sum(entry["cpu_ms"] for entry in categories.values())
+        test["wall_ms"] = sum(entry["wall_ms"] for entry in categories.values())
+        test["framework_cpu_ms"] = sum(entry["cpu_ms"] for category, entry in categories.items()
+                                       if category not in ("network_wait", "other"))
+        test["network_wait_ms"] = categories.get("network_wait", {}).get("wall_ms", 0.0)
+    return {"categories": run_categories, "tests": tests}
+
+
+def collapsed_stacks():
+    """
+    Returns the category stacks in the collapsed format of flame graph tools, one
+    'test;category;category <cpu microseconds>' line per stack.
+    """
+    with _lock:
+        totals = list(_totals.items())
+    lines = [f"{test.replace(';', ':')};{';'.join(path)} {cpu_ns // 1000}"
+             for (test, path), (_, cpu_ns, _) in totals if cpu_ns >= 1000]
+    return "\n".join(sorted(lines)) + "\n"
+
+
+def _output_path(extension: str):
+    # Parallel workers each write their own file
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    return os.path.join(LOG_DIR, f"profile.{worker}.{extension}" if worker else f"profile.{extension}")
+
+
+def write_profile(settings: dict):
+    """
+    Writes the run summary and, if settings enable "collapsed_stacks", the collapsed stacks.
+
+    Returns:
+    - list: The paths written.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    paths = [_output_path("json")]
+    with open(paths[0], "w", encoding="utf-8") as file:
+        json.dump({"worker": worker_id(), **summary()}, file, indent=2, sort_keys=True)
+    if settings.get("collapsed_stacks"):
+        paths.append(_output_path("collapsed"))
+        with open(paths[1], "w", encoding="utf-8") as file:
+            file.write(collapsed_stacks())
+    return paths
+
+
+def format_summary(profile: dict):
+    """
+    Formats the per-category totals of a summary() as lines for the terminal.
+    """
+    categories = profile["categories"]
+    cpu_total = sum(entry["cpu_ms"] for entry in categories.values()) or 1
+    lines = [f"{'category':<18}{'calls':>8}{'cpu ms':>12}{'wall ms':>12}{'cpu %':>8}"]
+    for category in [*CATEGORIES, *sorted(set(categories) - set(CATEGORIES))]:
+        if category in categories:
+            entry = categories[category]
+            lines.append(f"{category:<18}{entry['calls']:>8}{entry['cpu_ms']:>12.1f}{entry['wall_ms']:>12.1f}"
+                         f"{100 * entry['cpu_ms'] / cpu_total:>8.1f}")
+    return lines
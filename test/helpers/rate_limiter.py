@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows - buckets are only shared between threads of one process
+    fcntl = None
+
+_local_lock = threading.Lock()
+
+
+def _endpoint_matches(template: str, path: str):
+    """
+    Checks whether a concrete path matches an endpoint template such as "/v2/pet/:pet_id".
+    """
+    template_parts = template.strip("/").split("/")
+    path_parts = path.strip("/").split("/")
+    if len(template_parts) != len(path_parts):
+        return False
+    for template_part, path_part in zip(template_parts, path_parts):
+        if not template_part.startswith(":") and template_part != path_part:
+            return False
+    return True
+
+
+def _buckets_for(settings: dict, host: str, method: str, path: str):
+    """
+    Builds the list of (bucket_key, rate, burst) tuples a request has to take a token from.
+    """
+    buckets = []
+    per_host = settings.get("per_host")
+    if per_host:
+        buckets.append((host, float(per_host["rate"]), float(per_host.get("burst", per_host["rate"]))))
+
+    for endpoint, limits in settings.get("per_endpoint", {}).items():
+        # Keys are either "/v2/pet/:pet_id" (any method) or "GET /v2/pet/:pet_id"
+        endpoint_method, _, endpoint_path = endpoint.rpartition(" ")
+        if endpoint_method and endpoint_method.upper() != method:
+            continue
+        if _endpoint_matches(endpoint_path, path):
+            buckets.append((f"{host} {endpoint}", float(limits["rate"]),
+                            float(limits.get("burst", limits["rate"]))))
+    return buckets
+
+
+def _reserve(state: dict, buckets: list, now: float):
+    """
+    Takes one token from every bucket and returns how long the caller has to wait for it.
+
+    Buckets are allowed to go negative: a negative balance is a reservation that will be
+    paid back by the refill, so callers never have to retry under the lock.
+    """
+    wait = 0.0
+    for key, rate, burst in buckets:
+        tokens, last = state.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate) - 1
+        state[key] = (tokens, now)
+        if tokens < 0:
+            wait = max(wait, -tokens / rate)
+    return wait
+
+
+def _reserve_shared(state_file: str, buckets: list):
+    """
+    Reserves tokens from buckets stored in a state file shared by every worker process.
+    """
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    with open(state_file, "a+", encoding="utf-8") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            file.seek(0)
+            content = file.read()
+            state = {key: tuple(value) for key, value in json.loads(content).items()} if content else {}
+            # CLOCK_MONOTONIC is system wide, so timestamps are comparable between processes
+            wait = _reserve(state, buckets, time.monotonic())
+            file.seek(0)
+            file.truncate()
+            file.write(json.dumps(state))
+            file.flush()
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+    return wait
+
+
+_process_state = {}
+
+
+def acquire(config: dict, method: str, endpoint: str):
+    """
+    Blocks until the request is allowed by the configured token buckets.
+
+    Rate limiting is configured with the "rate_limit" section of config.json, for example:
+        "rate_limit": {
+            "enabled": true,
+            "per_host": {"rate": 50, "burst": 10},
+            "per_endpoint": {"POST /v2/pet": {"rate": 20}, "/v2/pet/findByStatus": {"rate": 5}},
+            "state_file": "../logs/.rate_limit.json"
+        }
+    Rates are requests per second. When "state_file" is set, the buckets are shared by every
+    process using it, so all workers of a sharded run stay under one combined budget.
+
+    Parameters:
+    - config (dict): The loaded config.json.
+    - method (str): The HTTP method of the request (e.g., 'GET').
+    - endpoint (str): The endpoint being requested, optionally with a query string.
+
+    Returns:
+    - float: The number of seconds the caller was delayed.
+    """
+    settings = config.get("rate_limit")
+    if not settings or not settings.get("enabled", True):
+        return 0.0
+
+    host = urlsplit(config["base_url"]).netloc
+    path = urlsplit(endpoint).path
+    buckets = _buckets_for(settings, host, method.upper(), path)
+    if not buckets:
+        return 0.0
+
+    state_file = settings.get("state_file")
+    with _local_lock:
+        if state_file and fcntl is not None:
+            wait = _reserve_shared(state_file, buckets)
+        else:
+            wait = _reserve(_process_state, buckets, time.monotonic())
+
+    if wait > 0:
+        time.sleep(wait)
+    return wait
@@ -0,0 +1,70 @@
+import json
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+
+class RouteIndex:
+    """
+    A trie over path segments that maps concrete paths such as '/v2/pet/1234' to the endpoint
+    templates used as keys in schema_db.json ('/v2/pet/:pet_id').
+
+    Lookups walk one trie node per path segment, so they cost O(path length) no matter how many
+    routes are indexed (a literal branch that dead-ends falls back to the ':param' branch).
+    Literal segments take precedence over ':param' segments, so
+    '/v2/pet/findByStatus' resolves to its own template rather than to '/v2/pet/:pet_id'.
+    """
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, template: str, value):
+        """
+        Indexes an endpoint template (e.g. '/v2/store/order/:orderId') with the value returned on a match.
+        """
+        node = self._root
+        for segment in template.strip("/").split("/"):
+            key = ":" if segment.startswith(":") else segment
+            node = node.setdefault(key, {})
+        node[None] = value
+
+    def _match(self, node: dict, segments: list, position: int):
+        if position == len(segments):
+            return node.get(None)
+        child = node.get(segments[position])
+        if child is not None:
+            match = self._match(child, segments, position + 1)
+            if match is not None:
+                return match
+        child = node.get(":")
+        if child is not None and segments[position]:
+            return self._match(child, segments, position + 1)
+        return None
+
+    def resolve(self, path: str):
+        """
+        Finds the template for a concrete path or URL. Query strings are ignored.
+
+        Returns:
+        - The value stored for the matching template, or None if no template matches.
+        """
+        return self._match(self._root, urlsplit(path).path.strip("/").split("/"), 0)
+
+    @classmethod
+    def from_schema_db(cls, schema_db: dict):
+        """
+        Builds an index resolving paths to (service, endpoint template) for every schema_db.json entry.
+        """
+        index = cls()
+        for service, endpoints in schema_db.items():
+            for template in endpoints:
+                index.add(template, (service, template))
+        return index
+
+
+@lru_cache(maxsize=None)
+def load_route_index(schema_path: str = '../api/schema_db.json'):
+    """
+    Loads schema_db.json and compiles its route index once per process.
+    """
+    with open(schema_path) as schema_file:
+        return RouteIndex.from_schema_db(json.load(schema_file))
@@ -0,0 +1,123 @@
+"""
+Reports how the responses seen in a run drift from the schemas stored in schema_db.json.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.schema_drift ../logs/api_pet.log ../logs/api_store.log
+    python -m test.helpers.schema_drift --cassette recorded.jsonl --json
+"""
+import argparse
+import json
+import sys
+from test.helpers.route_index import RouteIndex
+from test.helpers.schema_inference import (SCHEMA_DB, SchemaInference, iter_cassette_observations,
+                                           iter_log_observations)
+from test.helpers.schema_validator import schema_type_name
+
+
+def _section_drift(stored: dict, counts: dict, samples: int):
+    """
+    Compares the stored fields of one body or headers section with the observed type counters.
+    """
+    added = {key: sum(key_counts.values()) for key, key_counts in counts.items() if key not in stored}
+    removed = {}
+    changed = {}
+    for key, spec in stored.items():
+        expected_type = schema_type_name(spec)
+        key_counts = counts.get(key, {})
+        missing = samples - sum(key_counts.values())
+        if missing > 0 and not expected_type.endswith("?"):
+            removed[key] = missing
+        allowed_types = expected_type.rstrip("?").split("|")
+        for type_name, count in key_counts.items():
+            if type_name not in allowed_types:
+                changed.setdefault(key, {"expected": expected_type, "seen": {}})["seen"][type_name] = count
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def schema_drift(schema_db: dict, inference: SchemaInference):
+    """
+    Compares the observation counters of a SchemaInference with the stored schemas.
+
+    Only service/endpoint/method entries that were observed are compared; an observed entry that is
+    not in schema_db.json reports all of its keys as added.
+
+    Returns:
+    - dict: {service: {endpoint: {method: report}}} with only the entries that drifted. A report
+      has "body_samples", "header_samples" and, per "body" and "headers" section, "added" and
+      "removed" keys with how many samples had (or lacked) them and "changed" keys with the
+      expected type and the counts of each unexpected type seen.
+    """
+    drift = {}
+    for service, endpoints in inference.state.items():
+        for endpoint, methods in endpoints.items():
+            for method, entry in methods.items():
+                stored = schema_db.get(service, {}).get(endpoint, {}).get(method, {"body": {}, "headers": {}})
+                report = {"body_samples": entry["body_samples"], "header_samples": entry["header_samples"]}
+                if entry["body_samples"]:
+                    report["body"] = _section_drift(stored["body"], entry["body"], entry["body_samples"])
+                if entry["header_samples"]:
+                    report["headers"] = _section_drift(stored["headers"], entry["headers"], entry["header_samples"])
+                if any(any(report.get(section, {}).values()) for section in ("body", "headers")):
+                    drift.setdefault(service, {}).setdefault(endpoint, {})[method] = report
+    return drift
+
+
+def format_drift(drift: dict):
+    """
+    Formats a schema_drift() result as a readable report.
+    """
+    lines = []
+    for service, endpoints in drift.items():
+        for endpoint, methods in endpoints.items():
+            for method, report in methods.items():
+                lines.append(f"{service} {method} {endpoint}")
+                for section in ("body", "headers"):
+                    section_drift = report.get(section)
+                    if not section_drift:
+                        continue
+                    samples = report["body_samples" if section == "body" else "header_samples"]
+                    label = section.upper()
+                    for key, count in section_drift["added"].items():
+                        lines.append(f"  ({label}) + {key}: not in schema DB, seen in {count}/{samples}")
+                    for key, count in section_drift["removed"].items():
+                        lines.append(f"  ({label}) - {key}: missing in {count}/{samples}")
+                    for key, change in section_drift["changed"].items():
+                        seen = ", ".join(f"{type_name} x{count}" for type_name, count in change["seen"].items())
+                        lines.append(f"  ({label}) ~ {key}: expected {change['expected']}, seen {seen}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report drift between schema_db.json and recorded responses.")
+    parser.add_argument("log_files", nargs="*", help="suite logs written by api_logger")
+    parser.add_argument("--cassette", action="append", default=[], help="JSON lines file of recorded responses")
+    parser.add_argument("--schema-db", default=SCHEMA_DB)
+    parser.add_argument("--all-statuses", action="store_true", help="also compare non-2xx responses")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.schema_db) as schema_file:
+        schema_db = json.load(schema_file)
+    route_index = RouteIndex.from_schema_db(schema_db)
+
+    # Only per-key type counters are kept, so memory does not grow with the size of the inputs
+    inference = SchemaInference()
+    for log_file in args.log_files:
+        for observation in iter_log_observations(log_file, route_index, args.all_statuses):
+            inference.observe(*observation)
+    for cassette_file in args.cassette:
+        for observation in iter_cassette_observations(cassette_file, route_index, args.all_statuses):
+            inference.observe(*observation)
+
+    drift = schema_drift(schema_db, inference)
+    if args.json:
+        print(json.dumps(drift, indent=4))
+    elif drift:
+        print(format_drift(drift))
+    else:
+        print("No schema drift")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
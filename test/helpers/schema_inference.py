@@ -0,0 +1,196 @@
+"""
+Infers the flattened body and header schemas of schema_db.json from recorded traffic.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.schema_inference ../logs/api_pet.log --state ../logs/schema_state.json
+    python -m test.helpers.schema_inference --cassette recorded.jsonl --write
+"""
+import argparse
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+from test.helpers.json_codec import loads
+from test.helpers.log_files import iter_log_entries
+from test.helpers.route_index import RouteIndex
+from test.helpers.schema_validator import flatten_body
+
+SCHEMA_DB = os.path.join('..', 'api', 'schema_db.json')
+
+
+def resolve_route(route_index: RouteIndex, path: str):
+    """
+    Maps a concrete path (e.g. '/v2/pet/1234') to its service and endpoint template.
+
+    Templates already in schema_db.json win; unknown paths get numeric segments replaced by ':id'.
+
+    Returns:
+    - tuple: (service, endpoint template)
+    """
+    match = route_index.resolve(path)
+    if match is not None:
+        return match
+    path_parts = urlsplit(path).path.strip("/").split("/")
+    service = path_parts[1] if len(path_parts) > 1 and path_parts[0].startswith("v") else path_parts[0]
+    return service, "/" + "/".join(":id" if part.isdigit() else part for part in path_parts)
+
+
+class SchemaInference:
+    """
+    Accumulates type observations per service, endpoint and method.
+
+    Only counters are kept (samples seen, and how often each key had each type), so memory depends
+    on the number of distinct keys, not on the number of responses. The state is plain JSON and can
+    be saved and loaded to continue inference incrementally.
+    """
+
+    def __init__(self, state: dict = None):
+        self.state = state or {}
+
+    def _entry(self, service: str, endpoint: str, method: str):
+        return self.state.setdefault(service, {}).setdefault(endpoint, {}).setdefault(
+            method, {"body_samples": 0, "body": {}, "header_samples": 0, "headers": {}})
+
+    @staticmethod
+    def _count(counts: dict, types: dict):
+        for key, type_name in types.items():
+            key_counts = counts.setdefault(key, {})
+            key_counts[type_name] = key_counts.get(type_name, 0) + 1
+
+    def observe(self, service: str, endpoint: str, method: str, body=None, headers: dict = None):
+        """
+        Adds one response. List bodies count every object element as a sample.
+        """
+        entry = self._entry(service, endpoint, method)
+        items = body if isinstance(body, list) else [body]
+        for item in items:
+            if isinstance(item, dict):
+                entry["body_samples"] += 1
+                self._count(entry["body"], {key: type(value).__name__ for key, value in flatten_body(item).items()})
+        if headers is not None:
+            entry["header_samples"] += 1
+            self._count(entry["headers"], {key: type(value).__name__ for key, value in headers.items()})
+
+    @staticmethod
+    def _type_string(key_counts: dict, samples: int):
+        types = sorted(type_name for type_name in key_counts if type_name != "NoneType")
+        if "NoneType" in key_counts:
+            types.append("NoneType")
+        type_string = "|".join(types)
+        if sum(key_counts.values()) < samples:
+            type_string += "?"
+        return type_string
+
+    def schema(self):
+        """
+        Returns the inferred entries in schema_db.json format. Keys missing from some samples are
+        marked optional with a trailing '?', and keys that were null get a '|NoneType' alternative.
+        """
+        schema = {}
+        for service, endpoints in self.state.items():
+            for endpoint, methods in endpoints.items():
+                for method, entry in methods.items():
+                    schema.setdefault(service, {}).setdefault(endpoint, {})[method] = {
+                        "body": {key: self._type_string(counts, entry["body_samples"])
+                                 for key, counts in entry["body"].items()},
+                        "headers": {key: self._type_string(counts, entry["header_samples"])
+                                    for key, counts in entry["headers"].items()}
+                    }
+        return schema
+
+
+def iter_log_observations(log_file: str, route_index: RouteIndex, all_statuses: bool = False):
+    """
+    Yields (service, endpoint, method, body, headers) for every parseable response in a suite log.
+    Only 2xx responses are used unless all_statuses is set.
+    """
+    for entry in iter_log_entries(log_file):
+        status = entry.get("status", "")
+        if not all_statuses and not status.startswith("2"):
+            continue
+        try:
+            body = loads(entry.get("response", ""))
+        except ValueError:
+            body = None
+        headers = loads(entry.get("response_headers") or "null")
+        service, endpoint = resolve_route(route_index, entry.get("endpoint", ""))
+        yield service, endpoint, entry.get("method", "GET"), body, headers
+
+
+def iter_cassette_observations(cassette_file: str, route_index: RouteIndex, all_statuses: bool = False):
+    """
+    Yields observations from a cassette: a JSON lines file with one
+    {"method", "endpoint", "status", "body", "headers"} object per recorded response.
+    """
+    with open(cassette_file, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = loads(line)
+            if not all_statuses and not str(record.get("status", 200)).startswith("2"):
+                continue
+            service, endpoint = resolve_route(route_index, record["endpoint"])
+            yield service, endpoint, record["method"].upper(), record.get("body"), record.get("headers")
+
+
+def update_schema_db(schema_db: dict, inferred: dict):
+    """
+    Replaces the inferred service/endpoint/method entries in schema_db, keeping all others.
+    Hand-written constraint objects (enums, formats, ...) are kept when the inferred type matches.
+    """
+    for service, endpoints in inferred.items():
+        for endpoint, methods in endpoints.items():
+            existing_methods = schema_db.setdefault(service, {}).setdefault(endpoint, {})
+            for method, entry in methods.items():
+                existing = existing_methods.get(method, {})
+                for section in ("body", "headers"):
+                    for key, type_string in entry[section].items():
+                        spec = existing.get(section, {}).get(key)
+                        if isinstance(spec, dict) and spec["type"] == type_string:
+                            entry[section][key] = spec
+                existing_methods[method] = entry
+    return schema_db
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Infer schema_db.json entries from recorded responses.")
+    parser.add_argument("log_files", nargs="*", help="suite logs written by api_logger")
+    parser.add_argument("--cassette", action="append", default=[], help="JSON lines file of recorded responses")
+    parser.add_argument("--schema-db", default=SCHEMA_DB)
+    parser.add_argument("--state", help="inference state file to resume from and save to")
+    parser.add_argument("--all-statuses", action="store_true", help="also learn from non-2xx responses")
+    parser.add_argument("--write", action="store_true", help="update the schema DB instead of printing")
+    args = parser.parse_args(argv)
+
+    with open(args.schema_db) as schema_file:
+        schema_db = json.load(schema_file)
+    route_index = RouteIndex.from_schema_db(schema_db)
+
+    state = None
+    if args.state and os.path.exists(args.state):
+        with open(args.state, "r", encoding="utf-8") as state_file:
+            state = json.load(state_file)
+    inference = SchemaInference(state)
+
+    for log_file in args.log_files:
+        for observation in iter_log_observations(log_file, route_index, args.all_statuses):
+            inference.observe(*observation)
+    for cassette_file in args.cassette:
+        for observation in iter_cassette_observations(cassette_file, route_index, args.all_statuses):
+            inference.observe(*observation)
+
+    if args.state:
+        with open(args.state, "w", encoding="utf-8") as state_file:
+            json.dump(inference.state, state_file)
+
+    inferred = inference.schema()
+    if args.write:
+        with open(args.schema_db, "w") as schema_file:
+            json.dump(update_schema_db(schema_db, inferred), schema_file, indent=4)
+    else:
+        print(json.dumps(inferred, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
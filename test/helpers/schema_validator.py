@@ -0,0 +1,308 @@
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from test.helpers.route_index import load_route_index
+from test.helpers.json_codec import response_json
+from test.helpers.metrics import add_counts
+from test.helpers.profiling import profiled
+
+SCHEMA_DB_PATH = '../api/schema_db.json'
+
+_background_executor = None
+_executor_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def load_schema_db(schema_path: str = SCHEMA_DB_PATH):
+    """
+    Loads schema_db.json once per process.
+    """
+    with open(schema_path) as schema_file:
+        return json.load(schema_file)
+
+
+def flatten_body(body: dict, prefix: str = ""):
+    """
+    Flattens a JSON object like FlatDict(body, delimiter='.'): nested objects are joined with '.',
+    lists are kept as single values.
+    """
+    flattened = {}
+    for key, value in body.items():
+        if isinstance(value, dict) and value:
+            flattened.update(flatten_body(value, f"{prefix}{key}."))
+        else:
+            flattened[f"{prefix}{key}"] = value
+    return flattened
+
+
+def resolve_schema_key(service: str, endpoint: str):
+    """
+    Resolves a concrete path (e.g. '/v2/pet/1234') to its schema DB service and template.
+
+    Returns:
+    - tuple: (service, endpoint), unchanged if the path does not match any template.
+    """
+    if service is None or endpoint not in load_schema_db().get(service, {}):
+        route = load_route_index().resolve(endpoint)
+        if route is not None:
+            return route
+    return service, endpoint
+
+
+DATE_TIME = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$")
+FORMATS = {
+    "date-time": DATE_TIME.match
+}
+
+
+def schema_type_name(spec):
+    """
+    Returns the type part of a schema DB field, which is either a type string ("int", "str?")
+    or a constraint object ({"type": "str", "enum": [...]}).
+    """
+    return spec["type"] if isinstance(spec, dict) else spec
+
+
+def _compile_constraints(label: str, spec: dict):
+    """
+    Turns the constraints of a schema DB field object into a chain of predicates. Each predicate
+    takes (key, value, results), appends any mismatch messages to results and returns True
+    if the value failed.
+
+    Supported constraints:
+    - "enum": the list of allowed values.
+    - "format": a named string format, currently "date-time" (ISO 8601).
+    - "min" / "max": inclusive numeric bounds.
+    - "items": the schema of every list element, either a type string ("str") or a flattened
+      object schema ({"id": "int", "name": "str"}) using the same field notation.
+    """
+    chain = []
+    if "enum" in spec:
+        allowed_values = spec["enum"]
+
+        def check_enum(key, value, results):
+            if value not in allowed_values:
+                results.append(f"({label}) Element > {key} < expected to be one of > {allowed_values} < but actually > {value} <\n")
+                return True
+        chain.append(check_enum)
+
+    if "format" in spec:
+        format_name = spec["format"]
+        matches_format = FORMATS[format_name]
+
+        def check_format(key, value, results):
+            if isinstance(value, str) and not matches_format(value):
+                results.append(f"({label}) Element > {key} < expected to match format > {format_name} < but actually > {value} <\n")
+                return True
+        chain.append(check_format)
+
+    if "min" in spec:
+        minimum = spec["min"]
+
+        def check_min(key, value, results):
+            if value < minimum:
+                results.append(f"({label}) Element > {key} < expected to be at least > {minimum} < but actually > {value} <\n")
+                return True
+        chain.append(check_min)
+
+    if "max" in spec:
+        maximum = spec["max"]
+
+        def check_max(key, value, results):
+            if value > maximum:
+                results.append(f"({label}) Element > {key} < expected to be at most > {maximum} < but actually > {value} <\n")
+                return True
+        chain.append(check_max)
+
+    if "items" in spec:
+        items = spec["items"]
+        if isinstance(items, dict):
+            item_fields = CompiledSchema.compile_fields(label, items)
+
+            def check_items(key, value, results):
+                count = len(results)
+                for index, item in enumerate(value):
+                    if isinstance(item, dict):
+                        CompiledSchema.check_fields(label, item_fields, flatten_body(item), results,
+                                                    f"{key}[{index}].")
+                    else:
+                        results.append(f"({label}) Element > {key}[{index}] < expected to be > dict < "
+                                       f"but actually > {type(item).__name__} <\n")
+                return len(results) > count
+        else:
+            item_field = CompiledSchema.compile_fields(label, {"": items})
+
+            def check_items(key, value, results):
+                count = len(results)
+                for index, item in enumerate(value):
+                    CompiledSchema.check_fields(label, item_field, {"": item}, results, f"{key}[{index}]")
+                return len(results) > count
+        chain.append(check_items)
+    return tuple(chain)
+
+
+class CompiledSchema:
+    """
+    One schema DB entry (service, endpoint, method) prepared for repeated validation.
+
+    A field is either a type string or a constraint object (see _compile_constraints). Besides
+    plain Python type names ("int"), a type can list alternatives ("str|NoneType" for nullable
+    keys) and end with "?" for optional keys. Everything is parsed once here; fields without
+    constraints cost a single set lookup per response, like the plain type-name compare.
+    """
+
+    def __init__(self, expected_body: dict, expected_headers: dict):
+        self.expected_body = expected_body
+        self.expected_headers = expected_headers
+        self.body_checks = self.compile_fields("BODY", expected_body)
+        self.header_checks = self.compile_fields("HEADERS", expected_headers)
+
+    @staticmethod
+    def compile_fields(label: str, expected: dict):
+        checks = []
+        for key, spec in expected.items():
+            expected_type = schema_type_name(spec)
+            constraints = _compile_constraints(label, spec) if isinstance(spec, dict) else ()
+            checks.append((key, expected_type, frozenset(expected_type.rstrip("?").split("|")),
+                           expected_type.endswith("?"), constraints))
+        return checks
+
+    @staticmethod
+    def check_fields(label: str, checks: list, actual: dict, results: list, prefix: str = ""):
+        for key, expected_type, allowed_types, optional, constraints in checks:
+            if key in actual:
+                value = actual[key]
+                actual_type = type(value).__name__
+                if actual_type not in allowed_types:
+                    results.append(
+                        f"({label}) Element > {prefix}{key} < expected to be > {expected_type} < but actually > {actual_type} <\n")
+                elif constraints and value is not None:
+                    for constraint in constraints:
+                        if constraint(f"{prefix}{key}", value, results):
+                            break
+            elif not optional:
+                results.append(f"({label}) Element > {prefix}{key} < missing from schema\n")
+
+    def validate(self, flattened_body: dict, headers: dict, payload_must_match: bool = False,
+                 headers_must_match: bool = False):
+        """
+        Compares a flattened response body and the response headers against the schema.
+
+        Returns:
+        - list: The mismatch messages, empty if the response matches.
+        """
+        results = []
+        self.check_fields("BODY", self.body_checks, flattened_body, results)
+
+        # Check for additional keys in the actual payload if payloadMustMatch is True
+        if payload_must_match:
+            for key in flattened_body:
+                if key not in self.expected_body:
+                    results.append(
+                        f"Key      : {key}\n"
+                        f"Test     : MISSING\n"
+                        f"Expected : Element present\n"
+                        f"Actual   : Element in payload but not in schema DB \n\n"
+                    )
+
+        self.check_fields("HEADERS", self.header_checks, headers, results)
+
+        # Check for additional keys in the actual headers if headersMustMatch is True
+        if headers_must_match:
+            for key in headers:
+                if key not in self.expected_headers:
+                    results.append(
+                        f"Key      : {key}\n"
+                        f"Test     : MISSING\n"
+                        f"Expected : Element present\n"
+                        f"Actual   : Element in headers but not in schema DB \n\n"
+                    )
+        return results
+
+
+@lru_cache(maxsize=None)
+def compiled_schema(service: str, endpoint: str, method: str):
+    """
+    Returns the cached CompiledSchema for a schema DB entry, or None if there is no such entry.
+    """
+    entry = load_schema_db().get(service, {}).get(endpoint, {}).get(method)
+    if entry is None:
+        return None
+    return CompiledSchema(entry["body"], entry["headers"])
+
+
+def flatten_response_body(response):
+    """
+    Parses and flattens a response body the way schema_validation always has: objects are
+    flattened, for lists the first element is used.
+    """
+    try:
+        body_json = response_json(response)
+    except ValueError:
+        print("Error occurs when flattening body")
+        return {}
+    if isinstance(body_json, list):
+        body_json = body_json[0] if body_json else {}
+    return flatten_body(body_json) if isinstance(body_json, dict) else {}
+
+
+def summarize(results: list):
+    if results:
+        return f"\n{''.join(results)}\nThere are {len(results)} mismatches!\n"
+    return "No mismatch values"
+
+
+@profiled("schema_validation")
+def validate_response(schema: CompiledSchema, response, payload_must_match: bool = False,
+                      headers_must_match: bool = False):
+    """
+    Validates a response against a compiled schema and returns the schema_validation summary.
+    """
+    results = schema.validate(flatten_response_body(response), dict(response.headers),
+                              payload_must_match, headers_must_match)
+    return summarize(results)
+
+
+def validate_inline(settings: dict, method: str, endpoint: str, response):
+    """
+    Validates a response as it arrives, for the opt-in inline validation mode of the request helpers.
+
+    Configured with the "inline_schema_validation" section of config.json:
+        "inline_schema_validation": {"enabled": true, "background": true,
+                                     "payload_must_match": false, "headers_must_match": false}
+    Only 2xx responses of endpoints and methods present in schema_db.json are validated. Every
+    validation is counted as schema_validated in the per-endpoint metrics, and every response
+    outside the schema as schema_mismatches and with a warning; the test itself does not fail.
+
+    Returns:
+    - tuple: (service, template, method) of the schema used and the schema_validation summary
+      string, or a Future resolving to it when "background" is set. None if the response was not
+      validated.
+    """
+    global _background_executor
+    if not 200 <= response.status_code < 300:
+        return None
+    service, template = resolve_schema_key(None, endpoint)
+    schema = compiled_schema(service, template, method) if service else None
+    if schema is None:
+        return None
+
+    def run():
+        summary = validate_response(schema, response, settings.get("payload_must_match", False),
+                                    settings.get("headers_must_match", False))
+        mismatch = summary != "No mismatch values"
+        if mismatch:
+            logging.warning("Inline schema validation failed for %s %s:%s", method, endpoint, summary)
+        add_counts(method, endpoint, schema_validated=1, schema_mismatches=int(mismatch))
+        return summary
+
+    schema_key = (service, template, method.upper())
+    if settings.get("background"):
+        with _executor_lock:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="schema-validation")
+        return schema_key, _background_executor.submit(run)
+    return schema_key, run()
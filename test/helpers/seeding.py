@@ -0,0 +1,75 @@
+import hashlib
+import os
+import random
+
+SEED_ENV = "PETSTORE_SEED"
+
+_run_seed = None
+_current = None
+
+
+def run_seed(config: dict = None):
+    """
+    Returns the seed of this run: the PETSTORE_SEED environment variable, else "seed" in
+    config.json, else a random seed chosen once per process.
+
+    Parameters:
+    - config (dict, optional): The loaded config.json.
+
+    Returns:
+    - int: The run seed.
+    """
+    global _run_seed
+    if _run_seed is None:
+        configured = os.environ.get(SEED_ENV) or (config or {}).get("seed")
+        _run_seed = int(configured) if configured is not None else random.SystemRandom().randrange(2 ** 32)
+    return _run_seed
+
+
+def derive_test_seed(seed: int, node_id: str):
+    """
+    Derives the seed of one test from the run seed and the pytest node ID, so a test gets the
+    same data whichever tests run before it.
+    """
+    digest = hashlib.sha256(f"{seed}:{node_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def seed_test(node_id: str, fake, config: dict = None):
+    """
+    Seeds the global random module and the shared Faker instance for one test.
+
+    Parameters:
+    - node_id (str): The pytest node ID (e.g. 'test_pet.py::test_add_pet').
+    - fake (Faker): The Faker instance the data generators use.
+    - config (dict, optional): The loaded config.json.
+
+    Returns:
+    - tuple: (run seed, test seed)
+    """
+    global _current
+    seed = run_seed(config)
+    per_test_seed = derive_test_seed(seed, node_id)
+    random.seed(per_test_seed)
+    fake.seed_instance(per_test_seed)
+    _current = (seed, node_id)
+    return seed, per_test_seed
+
+
+def current_seed():
+    """
+    Returns (run seed, node ID) of the test being run, or None outside of a seeded test.
+    """
+    return _current
+
+
+def clear_seed():
+    global _current
+    _current = None
+
+
+def replay_command(seed: int, node_id: str):
+    """
+    Returns the command that replays one test with the data of the original run.
+    """
+    return f"{SEED_ENV}={seed} pytest '{node_id}'"
@@ -0,0 +1,217 @@
+"""
+Soak mode: runs selected specs over and over in one process and watches the framework's own
+resource use for leaks.
+
+After every iteration the RSS, open file descriptors, sockets, threads, log directory size,
+tracemalloc-traced memory and the length of the specs' created_* cleanup lists are sampled;
+longer iterations are also sampled periodically. A metric that never decreases over the last
+iterations and grew overall is flagged.
+
+Usage (from test/specs, with the repository root on PYTHONPATH):
+    python -m test.helpers.soak test_pet.py test_store.py --duration 3600 --sample-interval 60
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import pytest
+from test.helpers.log_files import LOG_DIR
+
+SOAK_LOG = os.path.join(LOG_DIR, "soak.jsonl")
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def _file_descriptors():
+    try:
+        targets = []
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                targets.append(os.readlink(f"/proc/self/fd/{fd}"))
+            except OSError:
+                pass  # closed while listing
+        return targets
+    except OSError:
+        return None
+
+
+def _log_bytes():
+    total = 0
+    if os.path.isdir(LOG_DIR):
+        for file_name in os.listdir(LOG_DIR):
+            path = os.path.join(LOG_DIR, file_name)
+            if os.path.isfile(path) and path != SOAK_LOG:
+                total += os.path.getsize(path)
+    return total
+
+
+def _created_list_sizes():
+    """
+    Returns the lengths of the created_* cleanup lists of the loaded spec modules.
+    """
+    sizes = {}
+    for name, module in list(sys.modules.items()):
+        if name.rsplit(".", 1)[-1].startswith("test_"):
+            for attribute, value in vars(module).items():
+                if attribute.startswith("created_") and isinstance(value, list):
+                    sizes[f"{name}.{attribute}"] = len(value)
+    return sizes
+
+
+def sample_resources(top_allocators: int = 5):
+    """
+    Samples the resource use of the current process.
+
+    Returns:
+    - dict: rss_bytes, open_fds, sockets, threads, log_bytes, traced_bytes, the created_* list
+      lengths and the top tracemalloc allocators (when tracemalloc is tracing).
+    """
+    targets = _file_descriptors()
+    sample = {
+        "time": time.time(),
+        "rss_bytes": _rss_bytes(),
+        "open_fds": len(targets) if targets is not None else None,
+        "sockets": sum(target.startswith("socket:") for target in targets) if targets is not None else None,
+        "threads": threading.active_count(),
+        "log_bytes": _log_bytes(),
+        "created": _created_list_sizes()
+    }
+    if tracemalloc.is_tracing():
+        sample["traced_bytes"] = tracemalloc.get_traced_memory()[0]
+        statistics = tracemalloc.take_snapshot().statistics("lineno")[:top_allocators]
+        sample["top_allocators"] = [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                                    f"{stat.size} B in {stat.count} blocks" for stat in statistics]
+    return sample
+
+
+def _metric_series(samples: list):
+    series = {}
+    for sample in samples:
+        for name in ("rss_bytes", "open_fds", "sockets", "threads", "log_bytes", "traced_bytes"):
+            if sample.get(name) is not None:
+                series.setdefault(name, []).append(sample[name])
+        for name, size in sample["created"].items():
+            series.setdefault(name, []).append(size)
+    return series
+
+
+def monotonic_growth(values: list, window: int = 5, tolerance: float = 0.0):
+    """
+    Tells whether the last window values never decreased and the last one is higher than the
+    first one by more than tolerance (a fraction of the first value).
+    """
+    if len(values) < window:
+        return False
+    recent = values[-window:]
+    never_decreased = all(later >= earlier for earlier, later in zip(recent, recent[1:]))
+    return never_decreased and recent[-1] > recent[0] * (1 + tolerance)
+
+
+def find_growth(samples: list, window: int = 5, tolerance: float = 0.0):
+    """
+    Returns {metric: (first, last)} for every metric growing monotonically over the samples.
+    """
+    return {name: (values[0], values[-1]) for name, values in _metric_series(samples).items()
+            if monotonic_growth(values, window, tolerance)}
+
+
+class _PeriodicSampler(threading.Thread):
+    def __init__(self, interval: float, write):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.write = write
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write({"phase": "running", **sample_resources()})
+
+
+def run_soak(specs: list, duration: float, sample_interval: float = 60, window: int = 5,
+             tolerance: float = 0.01, pytest_args: list = None):
+    """
+    Repeats the specs in this process until the duration is over.
+
+    Parameters:
+    - specs (list): The spec files or node IDs to run (e.g. ['test_pet.py']).
+    - duration (float): How long to keep starting iterations, in seconds.
+    - sample_interval (float): How often to sample while an iteration is running, in seconds.
+    - window (int): The number of iteration samples a metric must not decrease over to be flagged.
+    - tolerance (float): The relative growth over the window ignored as noise.
+    - pytest_args (list, optional): Extra pytest arguments.
+
+    Returns:
+    - tuple: (iteration samples, {metric: (first, last)} for the metrics flagged as growing,
+      the tracemalloc allocation sites that grew most between the first and last iteration)
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    tracemalloc.start()
+    samples = []
+    lock = threading.Lock()
+
+    with open(SOAK_LOG, "w", encoding="utf-8") as soak_log:
+        def write(sample):
+            with lock:
+                soak_log.write(json.dumps(sample) + "\n")
+                soak_log.flush()
+
+        sampler = _PeriodicSampler(sample_interval, write)
+        sampler.start()
+        first_snapshot = None
+        deadline = time.monotonic() + duration
+        iteration = 0
+        try:
+            while time.monotonic() < deadline:
+                iteration += 1
+                exit_code = pytest.main([*specs, "-q", "-p", "no:cacheprovider", *(pytest_args or [])])
+                sample = {"phase": "iteration", "iteration": iteration, "exit_code": int(exit_code),
+                          **sample_resources()}
+                samples.append(sample)
+                write(sample)
+                if first_snapshot is None:
+                    first_snapshot = tracemalloc.take_snapshot()
+        finally:
+            sampler.stopped.set()
+            sampler.join()
+
+    growing_allocators = []
+    if first_snapshot is not None:
+        growing_allocators = [str(stat) for stat in
+                              tracemalloc.take_snapshot().compare_to(first_snapshot, "lineno")[:10]
+                              if stat.size_diff > 0]
+    tracemalloc.stop()
+    return samples, find_growth(samples, window, tolerance), growing_allocators
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Repeat specs and watch the framework for leaks.")
+    parser.add_argument("specs", nargs="+", help="spec files or node IDs, e.g. test_pet.py")
+    parser.add_argument("--duration", type=float, default=3600, help="seconds")
+    parser.add_argument("--sample-interval", type=float, default=60, help="seconds between samples")
+    parser.add_argument("--window", type=int, default=5, help="iterations a growing metric must span")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="relative growth ignored as noise")
+    args, pytest_args = parser.parse_known_args(argv)
+
+    samples, growth, growing_allocators = run_soak(args.specs, args.duration, args.sample_interval,
+                                                   args.window, args.tolerance, pytest_args)
+    print(f"\n{len(samples)} iterations, samples written to {SOAK_LOG}")
+    for name, (first, last) in growth.items():
+        print(f"GROWING {name}: {first} -> {last}")
+    if growing_allocators:
+        print("Allocation sites that grew since the first iteration:")
+        for line in growing_allocators:
+            print(f"  {line}")
+    return 1 if growth else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import hashlib
+
+
+class StreamedBody:
+    """
+    Summary of a response body that was consumed chunk by chunk instead of being read into memory.
+
+    Attributes:
+    - size (int): The number of body bytes received.
+    - sha256 (str): The hex SHA-256 digest of the body.
+    - prefix (bytes): The first bytes of the body, bounded by the configured prefix size.
+    - matches (dict): Maps every tracked pattern to True if it appeared anywhere in the body.
+
+    Supports the `in` operator for tracked patterns, so it can be passed to
+    verify_expected_response_text in place of the full response text.
+    """
+
+    def __init__(self, size: int, sha256: str, prefix: bytes, matches: dict):
+        self.size = size
+        self.sha256 = sha256
+        self.prefix = prefix
+        self.matches = matches
+
+    def __contains__(self, pattern):
+        return self.matches.get(pattern, False)
+
+    def log_text(self):
+        """
+        Returns the bounded text written to the request log for this body.
+        """
+        text = self.prefix.decode("utf-8", errors="replace")
+        if len(self.prefix) < self.size:
+            text = f"{text}... [truncated, {self.size} bytes, sha256 {self.sha256}]"
+        return text
+
+
+def consume_stream(response, patterns: list = None, prefix_bytes: int = 4096, chunk_size: int = 65536):
+    """
+    Iterates over a streamed response body, hashing, measuring and searching it incrementally.
+
+    Only one chunk plus a small overlap is held at any time, so memory stays flat regardless of
+    the body size.
+
+    Parameters:
+    - response: A response object returned by requests with stream=True.
+    - patterns (list, optional): Strings to look for in the body (e.g. '"status":"sold"').
+    - prefix_bytes (int): How many leading bytes to keep for logging.
+    - chunk_size (int): The number of bytes read per iteration.
+
+    Returns:
+    - StreamedBody: The summary of the consumed body.
+    """
+    patterns = [str(pattern) for pattern in patterns or []]
+    encoded = {pattern: pattern.encode("utf-8") for pattern in patterns}
+    pending = dict(encoded)
+    matches = {pattern: False for pattern in patterns}
+    # Keep the tail of the previous chunk so patterns spanning two chunks are still found
+    overlap = max((len(value) for value in encoded.values()), default=1) - 1
+
+    digest = hashlib.sha256()
+    size = 0
+    prefix = b""
+    tail = b""
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        digest.update(chunk)
+        size += len(chunk)
+        if len(prefix) < prefix_bytes:
+            prefix += chunk[:prefix_bytes - len(prefix)]
+        if pending:
+            window = tail + chunk
+            for pattern, value in list(pending.items()):
+                if value in window:
+                    matches[pattern] = True
+                    del pending[pattern]
+            tail = window[-overlap:] if overlap else b""
+
+    response.close()
+    return StreamedBody(size, digest.hexdigest(), prefix, matches)
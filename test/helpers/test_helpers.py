@@ -0,0 +1,209 @@
+from test.helpers.histogram import BUCKETS, SUB_BUCKETS, bucket_index, bucket_lower_bound, percentile
+from test.helpers.route_index import RouteIndex
+from test.helpers.body_template import BodyTemplate
+from test.helpers.log_files import format_log_entry, iter_log_entries
+from test.helpers.log_merge import merge_log_files
+from test.helpers.rate_limiter import _reserve
+import json
+import pytest
+
+
+#
+# histogram tests
+#
+def test_histogram_small_latencies_get_one_bucket_each():
+    for latency_us in range(SUB_BUCKETS):
+        assert bucket_index(latency_us) == latency_us
+        assert bucket_lower_bound(latency_us) == latency_us
+    assert bucket_index(-5) == 0
+
+
+def test_histogram_buckets_contain_their_latencies():
+    # Every latency lies between its bucket's lower bound and the next bucket's
+    for latency_us in [*range(16, 5000), 65535, 65536, 10 ** 6, 10 ** 9]:
+        index = bucket_index(latency_us)
+        assert bucket_lower_bound(index) <= latency_us < bucket_lower_bound(index + 1)
+
+
+def test_histogram_buckets_are_at_most_one_sixteenth_wide():
+    for index in range(SUB_BUCKETS, BUCKETS - 1):
+        lower = bucket_lower_bound(index)
+        assert bucket_lower_bound(index + 1) - lower <= max(1, lower // SUB_BUCKETS)
+        assert bucket_index(lower) == index
+
+
+def test_histogram_last_bucket_takes_longer_latencies():
+    assert bucket_index(bucket_lower_bound(BUCKETS - 1)) == BUCKETS - 1
+    assert bucket_index(10 ** 15) == BUCKETS - 1
+
+
+def test_histogram_percentile_ranks():
+    counts = [0] * BUCKETS
+    counts[bucket_index(10)] = 50
+    counts[bucket_index(1000)] = 40
+    counts[bucket_index(100000)] = 10
+    assert percentile(counts, 0.0) == 10
+    assert percentile(counts, 0.5) == 10
+    assert percentile(counts, 0.51) == bucket_lower_bound(bucket_index(1000))
+    assert percentile(counts, 0.9) == bucket_lower_bound(bucket_index(1000))
+    assert percentile(counts, 0.91) == bucket_lower_bound(bucket_index(100000))
+    assert percentile(counts, 1.0) == bucket_lower_bound(bucket_index(100000))
+
+
+def test_histogram_percentile_of_empty_histogram():
+    assert percentile([0] * BUCKETS, 0.5) is None
+
+
+#
+# route_index tests
+#
+def route_index(*templates):
+    index = RouteIndex()
+    for template in templates:
+        index.add(template, template)
+    return index
+
+
+def test_route_index_literal_segments_take_precedence():
+    index = route_index("/v2/pet/:pet_id", "/v2/pet/findByStatus")
+    assert index.resolve("/v2/pet/findByStatus?status=sold") == "/v2/pet/findByStatus"
+    assert index.resolve("/v2/pet/1234") == "/v2/pet/:pet_id"
+    assert index.resolve("https://petstore.swagger.io/v2/pet/1234") == "/v2/pet/:pet_id"
+
+
+def test_route_index_backtracks_from_dead_end_literal():
+    # 'b' matches a literal branch that has no 'd' below it, so the ':x' branch is tried next
+    index = route_index("/a/b/c", "/a/:x/d")
+    assert index.resolve("/a/b/c") == "/a/b/c"
+    assert index.resolve("/a/b/d") == "/a/:x/d"
+    assert index.resolve("/a/b/e") is None
+
+
+def test_route_index_backtracks_from_literal_without_template():
+    # '/v2/pet/findByStatus' is only a prefix of a template, so the path falls back to ':pet_id'
+    index = route_index("/v2/pet/:pet_id", "/v2/pet/findByStatus/all")
+    assert index.resolve("/v2/pet/findByStatus") == "/v2/pet/:pet_id"
+
+
+def test_route_index_params_do_not_match_empty_segments():
+    index = route_index("/v2/pet/:pet_id/uploadImage")
+    assert index.resolve("/v2/pet/1/uploadImage") == "/v2/pet/:pet_id/uploadImage"
+    assert index.resolve("/v2/pet//uploadImage") is None
+    assert index.resolve("/v2/pet/1") is None
+
+
+#
+# body_template tests
+#
+PET_PAYLOAD = {
+    "id": 0,
+    "category": {"id": 0, "name": "Dog"},
+    "name": "",
+    "note": "100% %s %d",
+    "status": "available"
+}
+
+
+def test_body_template_renders_same_json_as_encoder():
+    template = BodyTemplate(PET_PAYLOAD, ["name", "category.id", "id"])
+    body = template.render(id=1234, name="Rex", **{"category.id": 7})
+    assert json.loads(body) == {**PET_PAYLOAD, "id": 1234, "category": {"id": 7, "name": "Dog"}, "name": "Rex"}
+    # Fields are filled in the order they appear in the body, whatever the order they were listed in
+    assert template.fields == ["id", "category.id", "name"]
+
+
+def test_body_template_escapes_values():
+    template = BodyTemplate(PET_PAYLOAD, ["name", "status"])
+    name = 'He said "hi" \\ 50% %s\n'
+    body = template.render(name=name, status="%d%%")
+    assert json.loads(body)["name"] == name
+    assert json.loads(body)["status"] == "%d%%"
+    assert json.loads(body)["note"] == "100% %s %d"
+
+
+def test_body_template_renders_non_int_values():
+    template = BodyTemplate(PET_PAYLOAD, ["id", "category"])
+    body = template.render(id=True, category={"id": 1, "name": "Cat"})
+    assert json.loads(body)["id"] is True
+    assert json.loads(body)["category"] == {"id": 1, "name": "Cat"}
+
+
+def test_body_template_rejects_unknown_fields():
+    with pytest.raises(KeyError):
+        BodyTemplate(PET_PAYLOAD, ["category.breed"])
+
+
+#
+# log_merge tests
+#
+def write_log(path, times):
+    with open(path, "w", encoding="utf-8") as file:
+        for time in times:
+            file.write(format_log_entry({"time": time, "endpoint": f"/v2/pet/{path.stem}"}))
+    return str(path)
+
+
+def test_merge_log_files_orders_entries_by_time(tmp_path):
+    log_files = [
+        write_log(tmp_path / "api_pet.gw0.log", ["2024-05-01 12:00:00.000001", "2024-05-01 12:00:03.000000"]),
+        write_log(tmp_path / "api_pet.gw1.log", ["2024-05-01 12:00:00.500000", "2024-05-01 12:00:01.000000",
+                                                 "2024-05-01 12:00:04.000000"]),
+        write_log(tmp_path / "api_pet.gw2.log", []),
+        write_log(tmp_path / "api_pet.gw3.log", ["2024-05-01 12:00:02.000000"])
+    ]
+    output_file = str(tmp_path / "api_pet.log")
+    assert merge_log_files(log_files, output_file) == 6
+
+    entries = list(iter_log_entries(output_file))
+    assert [entry["time"] for entry in entries] == sorted(entry["time"] for entry in entries)
+    assert [entry["endpoint"] for entry in entries] == [
+        "/v2/pet/api_pet.gw0", "/v2/pet/api_pet.gw1", "/v2/pet/api_pet.gw1",
+        "/v2/pet/api_pet.gw3", "/v2/pet/api_pet.gw0", "/v2/pet/api_pet.gw1"]
+
+
+def test_merge_log_files_keeps_input_order_for_equal_times(tmp_path):
+    log_files = [write_log(tmp_path / "api_pet.gw0.log", ["2024-05-01 12:00:00.000000"]),
+                 write_log(tmp_path / "api_pet.gw1.log", ["2024-05-01 12:00:00.000000"])]
+    output_file = str(tmp_path / "api_pet.log")
+    merge_log_files(log_files, output_file)
+    assert [entry["endpoint"] for entry in iter_log_entries(output_file)] == [
+        "/v2/pet/api_pet.gw0", "/v2/pet/api_pet.gw1"]
+
+
+#
+# rate_limiter tests
+#
+def test_reserve_spends_burst_before_waiting():
+    state = {}
+    buckets = [("host", 2.0, 3.0)]
+    assert [_reserve(state, buckets, 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert _reserve(state, buckets, 0.0) == 0.5
+
+
+def test_reserve_accumulates_debt():
+    # Callers reserve ahead: each one waits for its own token, not for the previous caller's
+    state = {}
+    buckets = [("host", 2.0, 1.0)]
+    assert [_reserve(state, buckets, 0.0) for _ in range(4)] == [0.0, 0.5, 1.0, 1.5]
+    assert state["host"] == (-3.0, 0.0)
+
+
+def test_reserve_refill_pays_back_debt_and_caps_at_burst():
+    state = {}
+    buckets = [("host", 2.0, 1.0)]
+    _reserve(state, buckets, 0.0)
+    _reserve(state, buckets, 0.0)
+    assert state["host"] == (-1.0, 0.0)
+    # One second refills two tokens: the debt and this request
+    assert _reserve(state, buckets, 1.0) == 0.0
+    assert state["host"] == (0.0, 1.0)
+    # A long idle time refills no more than the burst
+    assert _reserve(state, buckets, 100.0) == 0.0
+    assert state["host"] == (0.0, 100.0)
+
+
+def test_reserve_waits_for_the_slowest_bucket():
+    state = {}
+    buckets = [("host", 10.0, 1.0), ("host GET /v2/pet/:pet_id", 1.0, 1.0)]
+    assert _reserve(state, buckets, 0.0) == 0.0
+    assert _reserve(state, buckets, 0.0) == 1.0
@@ -6,9 +6,22 @@ import os
 from faker import Faker
 from flatdict import FlatDict
 import logging
+import threading
+from test.helpers.metrics import record as record_metrics
+from test.helpers.log_files import append_log_entry, remove_log_segments, suite_log_file
+from test.helpers import log_sampling
+from test.helpers.seeding import current_seed
+from test.helpers.json_codec import dumps, response_json
+from test.helpers.phase_timing import format_phases
+from test.helpers.clock import elapsed_ms, wall_time
+from test.helpers.profiling import profiled
+from test.helpers.schema_validator import resolve_schema_key, compiled_schema, validate_response
 
 fake = Faker()
 debug_file_name = ""
+_started_suite_logs = set()
+# Threads that generate data in the background get their own random and Faker (see use_private_data)
+_private_data = threading.local()
 
 
 def load_config():
@@ -17,14 +30,52 @@ def load_config():
     return config_data
 
 
+def use_private_data(seed: int = None):
+    """
+    Makes the data generators draw from a random.Random and Faker of the calling thread instead of
+    the shared ones, so data generated in the background does not shift the seeded data of the
+    test that is running.
+
+    Parameters:
+    - seed (int, optional): Reseeds the thread's generators, so a task gets the same data whichever
+      pool thread runs it (see data_seed). Without a seed, generators already set up are kept.
+    """
+    if getattr(_private_data, "random", None) is None:
+        _private_data.random = random.Random()
+        _private_data.fake = Faker()
+    elif seed is None:
+        return
+    seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+    _private_data.random.seed(seed)
+    _private_data.fake.seed_instance(seed)
+
+
+def data_seed():
+    """
+    Draws a seed for use_private_data from the calling thread's generators, e.g. one per task
+    before it is handed to a thread pool, so seeded tests stay reproducible.
+    """
+    return _random().getrandbits(64)
+
+
+def _random():
+    return getattr(_private_data, "random", None) or random
+
+
+def _fake():
+    return getattr(_private_data, "fake", None) or fake
+
+
 def random_id():
-    return random.randint(1, 10000)
+    return _random().randint(1, 10000)
 
 
-def random_array(length_range=(1, 3), element_generator=fake.url):
-    return [element_generator() for _ in range(random.randint(*length_range))]
+def random_array(length_range=(1, 3), element_generator=None):
+    element_generator = element_generator or _fake().url
+    return [element_generator() for _ in range(_random().randint(*length_range))]
 
 
+@profiled("data_generation")
 def generate_random_pet_data(pet_id=None, category_id=None, name=None, category=None, status=None, photo_urls=None,
                              tags=None):
     """
@@ -50,13 +101,13 @@ def generate_random_pet_data(pet_id=None, category_id=None, name=None, category=
     # Use provided values or generate random ones using Faker
     pet_id = pet_id if pet_id is not None else random_id()
     category_id = category_id if category_id is not None else random_id()
-    pet_name = name if name else fake.first_name()
-    pet_category = category if category else random.choice(categories)
-    pet_status = status if status else random.choice(statuses)
+    pet_name = name if name else _fake().first_name()
+    pet_category = category if category else _random().choice(categories)
+    pet_status = status if status else _random().choice(statuses)
 
     # Generate random photoUrls and tags arrays using Faker
     photo_urls = photo_urls if photo_urls else random_array()
-    tags = tags if tags else [{"id": random_id(), "name": fake.word()} for _ in range(random.randint(1, 3))]
+    tags = tags if tags else [{"id": random_id(), "name": _fake().word()} for _ in range(_random().randint(1, 3))]
 
     return {
         "id": pet_id,
@@ -71,6 +122,7 @@ def generate_random_pet_data(pet_id=None, category_id=None, name=None, category=
     }
 
 
+@profiled("data_generation")
 def generate_random_store_order_data(order_id=None, pet_id=None, quantity=None, ship_date=None, status=None,
                                      complete=None):
     """
@@ -94,10 +146,10 @@ def generate_random_store_order_data(order_id=None, pet_id=None, quantity=None,
     # Use provided values or generate random ones using Faker
     store_order_id = order_id if order_id is not None else random_id()
     store_order_pet_id = pet_id if pet_id is not None else random_id()
-    store_order_quantity = quantity if quantity is not None else random.randint(1, 5)
+    store_order_quantity = quantity if quantity is not None else _random().randint(1, 5)
     store_order_ship_date = ship_date if ship_date else datetime.utcnow().isoformat()[:-3] + '+0000'
-    store_order_status = status if status else random.choice(statuses)
-    store_order_complete = complete if complete else random.choice([True, False])
+    store_order_status = status if status else _random().choice(statuses)
+    store_order_complete = complete if complete else _random().choice([True, False])
 
     return {
         "id": store_order_id,
@@ -109,6 +161,7 @@ def generate_random_store_order_data(order_id=None, pet_id=None, quantity=None,
     }
 
 
+@profiled("data_generation")
 def generate_random_user_data(user_id=None, username=None, first_name=None, last_name=None, email=None,
                               password=None, phone=None, user_status=None):
     """
@@ -128,17 +181,17 @@ def generate_random_user_data(user_id=None, username=None, first_name=None, last
     - dict: A dictionary containing the user data in the desired format.
     """
 
-    random_first_name = fake.first_name()
-    random_last_name = fake.last_name()
+    random_first_name = _fake().first_name()
+    random_last_name = _fake().last_name()
 
     # Use provided values or generate random ones using Faker
     random_user_id = user_id if user_id is not None else random_id()
     user_username = username if username is not None else random_first_name[0]+random_last_name
     user_first_name = first_name if first_name is not None else random_first_name
     user_last_name = last_name if last_name is not None else random_last_name
-    user_email = email if email is not None else fake.email(domain="test.com")
-    user_password = password if password else fake.password(length=12, special_chars=True, upper_case=True)
-    user_phone = phone if phone else fake.phone_number()
+    user_email = email if email is not None else _fake().email(domain="test.com")
+    user_password = password if password else _fake().password(length=12, special_chars=True, upper_case=True)
+    user_phone = phone if phone else _fake().phone_number()
     user_user_status = user_status if user_status else 0
 
     return {
@@ -194,6 +247,7 @@ def verify_unexpected_response_text(unexpected_response_text, response_body):
         return None
 
 
+@profiled("api_test")
 def api_test(response, actual_status_code: int = None,
              expected_status_code: int = None,
              expected_response_text: list = None,
@@ -207,7 +261,9 @@ def api_test(response, actual_status_code: int = None,
             results = results + [temp_results]
 
     if expected_response_text is not None:
-        temp_results = verify_expected_response_text(expected_response_text, response.text)
+        # Streamed responses only keep the patterns tracked while the body was consumed
+        response_body = getattr(response, "streamed", None) or response.text
+        temp_results = verify_expected_response_text(expected_response_text, response_body)
         if temp_results is not None:
             results = results + temp_results
 
@@ -236,6 +292,36 @@ def set_debug_file_name(suite_name: str = "unnamed"):
     debug_file_name = suite_name
 
 
+def use_suite_log(suite_name: str):
+    """
+    Points api_logger at a suite's log in this process. The conftest calls it before every test,
+    so every pytest-xdist worker logs under the suite name, not only the one that ran test_setup.
+    The first call for a suite removes this worker's log file left over from an earlier run.
+
+    Args:
+        suite_name (str): The name of the test suite (e.g. 'api_pet').
+    """
+    set_debug_file_name(suite_name)
+    if suite_name not in _started_suite_logs:
+        _started_suite_logs.add(suite_name)
+        _remove_log_file(suite_log_file(suite_name, per_worker=True))
+
+
+def _remove_log_file(log_file: str):
+    remove_log_segments(log_file)
+    if os.path.isfile(log_file):
+        os.remove(log_file)
+
+
+def payload_text(payload):
+    """
+    Returns a request payload as logged JSON text; pre-encoded bytes bodies are logged as they are.
+    """
+    if isinstance(payload, bytes):
+        return payload.decode("utf-8", errors="replace")
+    return dumps(payload)
+
+
 def curl_builder(url: str, payload: dict, method: str, headers: dict):
     command = "curl -svX "
     command = command + method.upper() + " " + url + " "
@@ -243,36 +329,91 @@ def curl_builder(url: str, payload: dict, method: str, headers: dict):
         for key, value in headers.items():
             command = command + "-H {'" + key + "':'" + value + "'} "
     if payload is not None:
-        command = command + "-d '" + json.dumps(payload) + "'"
+        command = command + "-d '" + payload_text(payload) + "'"
     return command
 
 
+def build_log_entry(endpoint: str, payload: dict, headers: dict, response: str, method: str, url: str,
+                    duration_ms: float, wire_bytes: int = None, decoded_bytes: int = None, decode_ms: float = None,
+                    status_code: int = None, level: str = "full", response_headers: dict = None,
+                    seed: tuple = None, phases: dict = None, end_ns: int = None):
+    """
+    Formats one api_logger entry. The "summary" level leaves out the curl command, payload,
+    headers and response, which are the expensive parts to serialize. seed is the (run seed,
+    node ID) of the test that sent the request, logged so the test can be replayed. end_ns is
+    the clock reading the entry time is taken from (default: now).
+    """
+    body_size_line = ""
+    if wire_bytes is not None:
+        body_size_line = f"\tbytes: wire {wire_bytes} / decoded {decoded_bytes}\n"
+        if decode_ms is not None:
+            body_size_line += f"\tdecode: {decode_ms:.3f} ms\n"
+    if phases:
+        body_size_line += f"\tphases: {format_phases(phases)}\n"
+    summary = (
+        "{\n"
+        f"\tendpoint: {endpoint}\n"
+        f"\tmethod: {method}\n"
+        f"\tstatus: {status_code}\n"
+        f"\turl: {url}\n"
+        f"\ttime: {wall_time(end_ns)}\n"
+    )
+    if seed is not None:
+        summary += f"\tseed: {seed[0]}\n\ttest: {seed[1]}\n"
+    if level == "summary":
+        return summary + f"\tduration: {int(duration_ms)} ms\n{body_size_line}}}\n"
+
+    rebuilt_curl = curl_builder(url, payload, method, headers)
+    return (
+        summary +
+        f"\tCURL: {rebuilt_curl}\n"
+        f"\tduration: {int(duration_ms)} ms\n"
+        f"{body_size_line}"
+        f"\tpayload: {payload_text(payload)}\n"
+        f"\theaders: {dumps(headers)}\n"
+        f"\tresponse: {''.join(response.splitlines())}\n"
+        f"\tresponse_headers: {dumps(response_headers)}\n"
+        "}\n"
+    )
+
+
+@profiled("api_logger")
 def api_logger(endpoint: str, payload: dict, headers: dict, response: str, method: str,
-               start_time: datetime, end_time: datetime):
+               start_ns: int, end_ns: int, wire_bytes: int = None, decoded_bytes: int = None,
+               decode_ms: float = None, status_code: int = None, response_headers: dict = None,
+               phases: dict = None):
+    """
+    Records the metrics of a request and writes its log entry, unless log sampling skips it.
+    start_ns and end_ns are test.helpers.clock.now_ns() readings taken around the request.
+    """
     log_dir = os.path.join('..', 'logs')
-    log_file = os.path.join(log_dir, f"{debug_file_name}.log")
 
     # Ensure the log directory exists
     os.makedirs(log_dir, exist_ok=True)
 
-    total_duration = end_time - start_time
+    # Metrics are recorded for every request, whether or not its log entry is sampled
+    duration_ms = elapsed_ms(start_ns, end_ns)
+    record_metrics(method, endpoint, duration_ms, wire_bytes=wire_bytes,
+                   decoded_bytes=decoded_bytes, decode_ms=decode_ms,
+                   **{f"{phase}_ms": value for phase, value in (phases or {}).items()})
     config = load_config()
+    log_file = suite_log_file(debug_file_name, config.get("per_worker_logs", False))
+    sampling = config.get("log_sampling", {})
+    decision = log_sampling.decide(sampling, log_file, method, endpoint, status_code, duration_ms)
+    if decision == log_sampling.SKIP:
+        return
+
     url = f"{config['base_url']}{endpoint}"
-    rebuilt_curl = curl_builder(url, payload, method, headers)
-    log_entry = (
-        "{\n"
-        f"\tendpoint: {endpoint}\n"
-        f"\turl: {url}\n"
-        f"\ttime: {datetime.now()}\n"
-        f"\tCURL: {rebuilt_curl}\n"
-        f"\tduration: {int(total_duration.microseconds / 1000)} ms\n"
-        f"\tpayload: {json.dumps(payload)}\n"
-        f"\theaders: {json.dumps(headers)}\n"
-        f"\tresponse: {''.join(response.splitlines())}\n"
-        "}\n"
-    )
-    with open(log_file, 'a', encoding='utf-8') as file:
-        file.write(log_entry)
+    log_entry = build_log_entry(endpoint, payload, headers, response, method, url, duration_ms, wire_bytes,
+                                decoded_bytes, decode_ms, status_code, sampling.get("level", "full"),
+                                response_headers, current_seed(), phases, end_ns)
+    if decision == log_sampling.DEFER:
+        log_sampling.defer(sampling, log_file, method, endpoint, duration_ms, log_entry,
+                           config.get("log_rotation"))
+        return
+
+    log_sampling.charge(sampling, len(log_entry))
+    append_log_entry(log_file, log_entry, config.get("log_rotation"))
 
 
 def clear_log_files():
@@ -288,8 +429,8 @@ def clear_log_files():
     else:
         # Iterate over all files in the directory
         for file_name in os.listdir(log_dir):
-            # Check if the file has a .log extension
-            if file_name.endswith('.log'):
+            # Check if the file is a .log file or one of its rotated segments
+            if file_name.endswith('.log') or '.log-' in file_name:
                 log_file = os.path.join(log_dir, file_name)
                 if os.path.isfile(log_file):
                     os.remove(log_file)
@@ -313,6 +454,12 @@ def clear_log_file(suite_name: str):
         # Build the expected log file name
         log_file = os.path.join(log_dir, f"{suite_name}.log")
 
+        # Rotated segments belong to the suite as well. Of the per-worker files only this worker's
+        # own is removed, other workers may still be appending to theirs (each worker removes its
+        # stale file itself, see use_suite_log)
+        remove_log_segments(log_file)
+        _remove_log_file(suite_log_file(suite_name, per_worker=True))
+
         # Check if the log file exists and delete it
         if os.path.isfile(log_file):
             os.remove(log_file)
@@ -341,13 +488,13 @@ def api_debugger(api_response):
 
     # Raw JSON Body
     try:
-        body_json = api_response.json()
-        logging.info("\nRaw JSON Body: %s", json.dumps(body_json))
+        body_json = response_json(api_response)
+        logging.info("\nRaw JSON Body: %s", dumps(body_json))
     except ValueError:
         logging.info("\nRaw JSON Body: %s", api_response.text)  # In case body is not JSON
 
     # Raw Headers
-    logging.info("\nRaw Headers: %s", json.dumps(dict(api_response.headers)))
+    logging.info("\nRaw Headers: %s", dumps(dict(api_response.headers)))
 
     # Raw Text Body
     logging.info("\nRaw Text Body: %s", api_response.text)
@@ -373,8 +520,8 @@ def schema_validation(service, endpoint, method, response=None, payload_must_mat
     Validates the response body and headers against the schema defined in the schemaDB.json file.
 
     Parameters:
-    - service (str): The service name (e.g., 'pet').
-    - endpoint (str): The endpoint (e.g., '/v2/pet').
+    - service (str): The service name (e.g., 'pet'), or None to resolve it from the endpoint.
+    - endpoint (str): The endpoint template (e.g., '/v2/pet/:pet_id') or a concrete path (e.g., '/v2/pet/1234').
     - method (str): The HTTP method (e.g., 'POST').
     - response_body (dict, optional): The actual response body to validate.
     - response_headers (dict, optional): The actual response headers to validate.
@@ -384,81 +531,25 @@ def schema_validation(service, endpoint, method, response=None, payload_must_mat
     Returns:
     - str: A string summarizing the validation results.
     """
-    # Load the API schema database
-    with open('../api/schema_db.json') as schema_file:
-        api_schema_db = json.load(schema_file)
+    # Resolve concrete paths (e.g. '/v2/pet/1234') to their schema DB template
+    service, endpoint = resolve_schema_key(service, endpoint)
 
-    flattened_actual_body = {}
-    results = []
-
-    # Validate the response body if provided
-    if response is not None:
-        try:
-            body_json = response.json()
-            if isinstance(body_json, dict):
-                flattened_actual_body = FlatDict(body_json, delimiter='.')
-            elif isinstance(body_json, list):
-                flattened_actual_body = FlatDict(body_json[0], delimiter='.')
-        except ValueError:
-            print("Error occurs when flattening body")
-
-        expected_payload = api_schema_db[service][endpoint][method]["body"]
-
-        # Compare expected payload vs actual response body
-        for key, expected_type in expected_payload.items():
-            if key in flattened_actual_body:
-                actual_value = flattened_actual_body[key]
-                actual_type = type(actual_value).__name__
-                if actual_type != expected_type:
-                    results.append(
-                        f"(BODY) Element > {key} < expected to be > {expected_type} < but actually > {actual_type} <\n")
-            else:
-                results.append(f"(BODY) Element > {key} < missing from schema\n")
-
-        # Check for additional keys in the actual payload if payloadMustMatch is True
-        if payload_must_match:
-            for key in flattened_actual_body:
-                if key not in expected_payload:
-                    results.append(
-                        f"Key      : {key}\n"
-                        f"Test     : MISSING\n"
-                        f"Expected : Element present\n"
-                        f"Actual   : Element in payload but not in schema DB \n\n"
-                    )
-
-    # Validate the response headers if provided
-    if response is not None:
-        flattened_actual_headers = FlatDict(response.headers, delimiter='.')
-        expected_headers = api_schema_db[service][endpoint][method]["headers"]
-
-        # Compare expected headers vs actual response headers
-        for key, expected_type in expected_headers.items():
-            if key in flattened_actual_headers:
-                actual_value = flattened_actual_headers[key]
-                actual_type = type(actual_value).__name__
-                if actual_type != expected_type:
-                    results.append(
-                        f"(HEADERS) Element > {key} < expected to be > {expected_type} < but actually > {actual_type} <\n")
-            else:
-                results.append(f"(HEADERS) Element > {key} < missing from schema\n")
-
-        # Check for additional keys in the actual headers if headersMustMatch is True
-        if headers_must_match:
-            for key in flattened_actual_headers:
-                if key not in expected_headers:
-                    results.append(
-                        f"Key      : {key}\n"
-                        f"Test     : MISSING\n"
-                        f"Expected : Element present\n"
-                        f"Actual   : Element in headers but not in schema DB \n\n"
-                    )
-
-    # Summarize results
-    if results:
-        return f"\n{''.join(results)}\nThere are {len(results)} mismatches!\n"
-    else:
+    if response is None:
         return "No mismatch values"
 
+    # Reuse the result of inline validation when the response was already checked against the
+    # same schema entry with the same options
+    inline_results = getattr(response, "schema_results", None)
+    if (inline_results is not None and response.schema_key == (service, endpoint, method.upper())
+            and response.schema_options == (payload_must_match, headers_must_match)):
+        return inline_results.result() if hasattr(inline_results, "result") else inline_results
+
+    # The schema DB is loaded and compiled once per process, not on every call
+    schema = compiled_schema(service, endpoint, method)
+    if schema is None:
+        raise KeyError(f"No schema DB entry for {service} {endpoint} {method}")
+    return validate_response(schema, response, payload_must_match, headers_must_match)
+
 
 def string_gen(length: int):
     return "".join(random.choice(string.ascii_lowercase) for _ in range(length))
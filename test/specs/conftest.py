@@ -0,0 +1,93 @@
+import os
+import pytest
+from test.helpers.utils import fake, load_config, use_suite_log
+from test.helpers.seeding import SEED_ENV, run_seed, seed_test, clear_seed, replay_command
+from test.helpers import profiling
+from test.helpers.log_files import clear_worker_log_files
+
+
+def _node_id(item):
+    # Node IDs are relative to the directory pytest was started from; use the spec file name so
+    # the same test gets the same seed whether the run started in test/specs or the repository root
+    return item.nodeid.rsplit("/", 1)[-1]
+
+
+def _optional_config():
+    # load_config reads ../config relative to the working directory; when pytest is started from
+    # the repository root there is no config to read during start-up
+    try:
+        return load_config()
+    except FileNotFoundError:
+        return {}
+
+
+def _profiling_settings():
+    return _optional_config().get("profiling", {})
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "pool_clean: the test only reads the pooled pets and orders it "
+                                       "checks out, so the fixture pool may recycle them")
+    if _profiling_settings().get("enabled"):
+        profiling.enable()
+    if not hasattr(config, "workerinput"):
+        # xdist workers inherit the controller's environment, so they all use the seed in the header
+        os.environ[SEED_ENV] = str(run_seed(_optional_config()))
+        # Only the controller, before any worker starts, so log_merge sees this run's files only
+        if _optional_config():
+            clear_worker_log_files()
+
+
+def pytest_report_header(config):
+    return f"run seed: {run_seed(_optional_config())} (replay with {SEED_ENV})"
+
+
+@pytest.fixture(autouse=True)
+def suite_log(request):
+    """
+    Logs the requests of a test under its spec's SUITE_NAME, on every xdist worker.
+    """
+    suite_name = getattr(request.module, "SUITE_NAME", None)
+    if suite_name:
+        use_suite_log(suite_name)
+
+
+@pytest.fixture(autouse=True)
+def seeded_data(request):
+    """
+    Seeds the data generators per test from the run seed and the test's node ID, so a failing
+    test can be replayed with the same data on its own.
+    """
+    seed, _ = seed_test(_node_id(request.node), fake, load_config())
+    request.node.user_properties.append(("seed", seed))
+    yield
+    clear_seed()
+
+
+@pytest.fixture(autouse=True)
+def profiled_test(request):
+    """
+    Attributes the framework time spent during a test to it when profiling is enabled.
+    """
+    profiling.begin_test(_node_id(request.node))
+    yield
+    profiling.end_test()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        seed = dict(item.user_properties).get("seed", run_seed())
+        report.sections.append(("replay", replay_command(seed, _node_id(item))))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not profiling.is_enabled():
+        return
+    paths = profiling.write_profile(_profiling_settings())
+    terminalreporter.write_sep("-", "framework profile")
+    for line in profiling.format_summary(profiling.summary()):
+        terminalreporter.write_line(line)
+    terminalreporter.write_line(f"written to {', '.join(paths)}")
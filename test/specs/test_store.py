@@ -1,14 +1,20 @@
 from test.helpers.utils import (generate_random_store_order_data, set_debug_file_name,
                                 api_test, clear_log_file, schema_validation, string_gen)
 from test.api.basic_requests import post, delete, get
-import json
+from test.helpers.bulk import bulk_create
+from test.helpers.fixture_pool import FixturePool
+from test.helpers.metrics import write_metrics_summary, reset as reset_metrics
+from test.helpers.json_codec import response_json
+import pytest
 
+SUITE_NAME = "api_store"
 created_order_ids = []
 
 
 def test_setup():
-    set_debug_file_name("api_store")
-    clear_log_file("api_store")
+    set_debug_file_name(SUITE_NAME)
+    clear_log_file(SUITE_NAME)
+    reset_metrics()
 
 
 #
@@ -42,7 +48,7 @@ def test_add_store_order():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -93,7 +99,7 @@ def test_add_store_order_schema():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -117,7 +123,7 @@ def test_add_store_order_id_missing():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -186,7 +192,7 @@ def test_add_store_order_id_invalid_negative_1():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -224,7 +230,7 @@ def test_add_store_order_id_zero():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -262,7 +268,7 @@ def test_add_store_order_id_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -299,7 +305,7 @@ def test_add_store_order_pet_id_missing():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -368,7 +374,7 @@ def test_add_store_order_pet_id_invalid_negative_1():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -407,7 +413,7 @@ def test_add_store_order_pet_id_zero():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -446,7 +452,7 @@ def test_add_store_order_pet_id_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -483,7 +489,7 @@ def test_add_store_quantity_missing():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -553,7 +559,7 @@ def test_add_store_quantity_invalid_negative_1():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -592,7 +598,7 @@ def test_add_store_quantity_zero():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -631,7 +637,7 @@ def test_add_store_quantity_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -669,7 +675,7 @@ def test_add_store_order_with_ship_date_missing():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -738,7 +744,7 @@ def test_add_store_order_with_ship_date_invalid_data_type():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -776,7 +782,7 @@ def test_add_store_order_with_ship_date_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -814,7 +820,7 @@ def test_add_store_order_with_status_placed():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -852,7 +858,7 @@ def test_add_store_order_with_status_missing():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -890,7 +896,7 @@ def test_add_store_order_with_status_invalid_data_type():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -929,7 +935,7 @@ def test_add_store_order_with_status_over_1024_chars():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -968,7 +974,7 @@ def test_add_store_order_with_status_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1006,7 +1012,7 @@ def test_add_store_order_with_complete_false():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1045,7 +1051,7 @@ def test_add_store_order_with_complete_true():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1114,7 +1120,7 @@ def test_add_store_order_with_complete_missing():
         "status": test_data["status"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1152,7 +1158,7 @@ def test_add_store_order_with_complete_null():
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1181,7 +1187,12 @@ def test_add_store_order_with_complete_null():
 # GET /store/order/:orderId tests
 #
 def create_test_order(force_id=None, force_pet_id=None, force_quantity=None,
-                      force_ship_date=None, force_status=None, force_complete=None):
+                      force_ship_date=None, force_status=None, force_complete=None, use_pool=True):
+    # Take a pre-provisioned order when no specific data is requested
+    if use_pool and order_pool.enabled and all(value is None for value in (
+            force_id, force_pet_id, force_quantity, force_ship_date, force_status, force_complete)):
+        return order_pool.checkout()
+
     # Generate random pet data
     test_data = generate_random_store_order_data(order_id=force_id, pet_id=force_pet_id,
                                                  quantity=force_quantity, ship_date = force_ship_date,
@@ -1197,7 +1208,7 @@ def create_test_order(force_id=None, force_pet_id=None, force_quantity=None,
         "complete": test_data["complete"]
     }
     response = post("/v2/store/order", payload, {"content-type": "application/json"})
-    order = json.loads(response.text)
+    order = response_json(response)
 
     # Store the created pet ID for cleanup
     created_order_ids.append(order['id'])
@@ -1207,6 +1218,30 @@ def create_test_order(force_id=None, force_pet_id=None, force_quantity=None,
     return test_data
 
 
+def delete_test_order(test_data):
+    # Delete an order right away instead of waiting for the suite clean-up
+    response = delete(f"/v2/store/order/{test_data['token']}")
+    if test_data["token"] in created_order_ids:
+        created_order_ids.remove(test_data["token"])
+    return response
+
+
+order_pool = FixturePool(lambda: create_test_order(use_pool=False), delete_test_order)
+
+
+@pytest.fixture(autouse=True)
+def release_pooled_orders(request):
+    yield
+    # Only orders of tests marked pool_clean are known to be unchanged and can be recycled
+    order_pool.release_checked_out(dirty=request.node.get_closest_marker("pool_clean") is None)
+
+
+def create_test_orders(specs, max_in_flight=8):
+    # Create many orders concurrently, specs are create_test_order overrides (or a count)
+    return bulk_create(create_test_order, specs, max_in_flight)
+
+
+@pytest.mark.pool_clean
 def test_fetch_store_order():
     # Generate random order
     test_data = create_test_order()
@@ -1233,6 +1268,7 @@ def test_fetch_store_order():
     assert test_results == "No mismatch values"
 
 
+@pytest.mark.pool_clean
 def test_fetch_store_order_schema():
     # Generate random order
     test_data = create_test_order()
@@ -1268,6 +1304,7 @@ def test_fetch_store_order_with_bad_token():
 #
 # GET /store/order/:orderId tests
 #
+@pytest.mark.pool_clean
 def test_fetch_store_inventory():
     # Generate random order
     create_test_order()
@@ -1289,6 +1326,7 @@ def test_fetch_store_inventory():
     assert test_results == "No mismatch values"
 
 
+@pytest.mark.pool_clean
 def test_fetch_store_inventory_schema():
     # Generate random order
     create_test_order()
@@ -1363,10 +1401,14 @@ def test_delete_store_order_with_bad_token():
 # Order Clean-up
 #
 def test_cleanup_created_order():
+    order_pool.stop()
     print(f"\n\nPost suite order cleanup...")
-    for order_id in created_order_ids:
+    # Entries are removed as they are cleaned up, so repeated runs in one process start empty
+    while created_order_ids:
+        order_id = created_order_ids.pop(0)
         response = delete(f"/v2/store/order/{order_id}")
         if response.status_code == 200:
             print(f"Deleted order with ID {order_id}")
         else:
-            print(f"Failed to delete order with ID {order_id}, status code: {response.status_code}")
\ No newline at end of file
+            print(f"Failed to delete order with ID {order_id}, status code: {response.status_code}")
+    write_metrics_summary(SUITE_NAME)
@@ -1,14 +1,17 @@
 from test.helpers.utils import (generate_random_user_data, set_debug_file_name,
                                 api_test, clear_log_file, schema_validation)
 from test.api.basic_requests import post, delete
+from test.helpers.metrics import write_metrics_summary, reset as reset_metrics
 import json
 
+SUITE_NAME = "api_user"
 created_user_names = []
 
 
 def test_setup():
-    set_debug_file_name("api_user")
-    clear_log_file("api_user")
+    set_debug_file_name(SUITE_NAME)
+    clear_log_file(SUITE_NAME)
+    reset_metrics()
 
 
 #
@@ -292,9 +295,12 @@ def test_add_user_with_id_invalid_null():
 #
 def test_cleanup_created_order():
     print(f"\n\nPost suite order cleanup...")
-    for user_name in created_user_names:
+    # Entries are removed as they are cleaned up, so repeated runs in one process start empty
+    while created_user_names:
+        user_name = created_user_names.pop(0)
         response = delete(f"/v2/user/{user_name}")
         if response.status_code == 200:
             print(f"Deleted user with username {user_name}")
         else:
-            print(f"Failed to delete user with username {user_name}, status code: {response.status_code}")
\ No newline at end of file
+            print(f"Failed to delete user with username {user_name}, status code: {response.status_code}")
+    write_metrics_summary(SUITE_NAME)